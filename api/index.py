@@ -1 +1,7 @@
-from backend.app import app
+import os
+import sys
+
+# The backend modules import each other by name (`from models import ...`), as when run from backend/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from app import app  # noqa: E402
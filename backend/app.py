@@ -1,22 +1,84 @@
-from fastapi import FastAPI, HTTPException, Depends, Header
-from fastapi.responses import JSONResponse
-import uuid
+from fastapi import FastAPI, HTTPException, Depends, Header, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse
+from pydantic import ValidationError
+from contextlib import asynccontextmanager, nullcontext
 import os
+import json
+import time
+from datetime import date
+from typing import Literal, Optional
 
-from models import UploadRequest, SummarizeRequest, SaveEditRequest, ShareRequest, SummaryResponse
-from llm import generate_summary
+from env import load_env
+load_env()  # before the imports below read their settings
+
+from models import (
+    UploadRequest, AppendRequest, BatchUploadRequest, SummarizeRequest, BatchSummarizeRequest, BatchSummarizeResponse, BatchSummaryResult,
+    SaveEditRequest, ShareRequest, SummaryResponse, JobSubmitResponse, JobStatusResponse,
+    SummarySearchResponse, ActionItemSearchResponse, DeadlineSearchResponse
+)
+from llm import generate_summary, generate_summaries, stream_summary, checkpoint_key, cache_stats
 from emailer import send_email
+from jobs import JobQueue
+from outbox import EmailOutbox
+from database import init_db
+from repository import repo
+from search import search_index, MAX_PAGE_SIZE
+from uploads import ingest, multipart_boundary, multipart_file, UploadError
+import metrics
+
+# -----------------------------
+# Summarize a stored transcript
+# -----------------------------
+def summarize_transcript(transcript_id: str, instruction: str, on_progress=None):
+    """
+    Summarize from the stored chunks, resuming from the last checkpoint for this
+    instruction so only chunks appended since then are sent to the model.
+    Returns (summary_id, structured, editable_text), or None if the transcript does not exist.
+    """
+    chunks = repo.get_chunks(transcript_id)
+    if chunks is None:
+        return None
+    key = checkpoint_key(instruction)
+    checkpoint = repo.get_checkpoint(transcript_id, key)
+    structured, editable_text = generate_summary(chunks, instruction, on_progress=on_progress, checkpoint=checkpoint)
+    repo.save_checkpoint(transcript_id, key, len(chunks), structured, editable_text)
+    return repo.add_summary(transcript_id, structured, editable_text), structured, editable_text
 
 # -----------------------------
-# In-memory storage
+# Background summarization jobs
 # -----------------------------
-TRANSCRIPTS = {}
-SUMMARIES = {}
+def run_summary_job(job: dict, report_progress) -> str:
+    result = summarize_transcript(job["transcript_id"], job["instruction"], on_progress=report_progress)
+    if not result:
+        raise LookupError("Transcript not found")
+    return result[0]
+
+job_queue = JobQueue(run_summary_job)
+outbox = EmailOutbox()
+
+metrics.callback(
+    "ai_notes_job_queue_depth", "Summarize jobs queued or running.", "gauge",
+    lambda: job_queue.depth(), ("state",)
+)
+metrics.callback("ai_notes_outbox_depth", "Email deliveries waiting to be sent.", "gauge", lambda: outbox.depth())
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema setup waits until the server starts, so importing the app stays cheap;
+    # the Groq client is created on the first model call
+    await run_in_threadpool(init_db)
+    job_queue.start()
+    outbox.start()
+    yield
+    outbox.stop()
+    job_queue.stop()
 
 # -----------------------------
 # FastAPI app
 # -----------------------------
 app = FastAPI(
+    lifespan=lifespan,
     title="AI Meeting Summarizer",
     description="""
 **Instructions for single actions**:
@@ -45,36 +107,142 @@ def verify_auth(
         raise HTTPException(status_code=401, detail="Invalid credentials")
     return True
 
+# -----------------------------
+# Request metrics and tracing
+# -----------------------------
+HTTP_SECONDS = metrics.histogram(
+    "ai_notes_http_request_seconds", "Time until the response starts, by route.", ("method", "route", "status")
+)
+
+@app.middleware("http")
+async def instrument(request: Request, call_next):
+    # Requests sent with `X-Trace: 1` (or all, with TRACE_REQUESTS=true) get a Server-Timing header
+    traced = metrics.TRACE_REQUESTS or "x-trace" in request.headers
+    start = time.perf_counter()
+    with metrics.start_trace() if traced else nullcontext() as spans:
+        response = await call_next(request)
+    elapsed = time.perf_counter() - start
+
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    HTTP_SECONDS.observe(elapsed, method=request.method, route=route, status=response.status_code)
+    if spans is not None:
+        response.headers["Server-Timing"] = metrics.server_timing(spans + [("total", elapsed)])
+    return response
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+# Batch limits: transcripts written per transaction, and items per summarize batch
+UPLOAD_BATCH_SIZE = int(os.getenv("UPLOAD_BATCH_SIZE", "100"))
+SUMMARIZE_BATCH_MAX_ITEMS = int(os.getenv("SUMMARIZE_BATCH_MAX_ITEMS", "500"))
+
 # -----------------------------
 # Upload transcript
 # -----------------------------
 @app.post("/upload", summary="Upload Transcript", description="Paste your transcript. After uploading, copy the `transcript_id` for use in Summarize endpoint.")
 def upload(req: UploadRequest, auth: bool = Depends(verify_auth)):
-    transcript_id = str(uuid.uuid4())
-    transcript = {"id": transcript_id, "text": req.transcript_text}
-    TRANSCRIPTS[transcript_id] = transcript
+    transcript_id = repo.add_transcript(req.transcript_text)
     return {"transcript_id": transcript_id, "note": "Copy this transcript_id for single summarize."}
 
+# -----------------------------
+# Upload transcript (streaming)
+# -----------------------------
+@app.post(
+    "/upload/stream",
+    summary="Upload Transcript (Streaming)",
+    description="Upload a large transcript as a raw UTF-8 body (e.g. `text/plain`) or as the file part of `multipart/form-data`. The text is chunked and stored compressed as it arrives, so memory use does not grow with the transcript's size. Returns a `transcript_id` usable with every summarize endpoint.",
+    openapi_extra={"requestBody": {"content": {
+        "text/plain": {"schema": {"type": "string"}},
+        "multipart/form-data": {"schema": {"type": "object", "properties": {"file": {"type": "string", "format": "binary"}}}}
+    }}}
+)
+async def upload_stream(request: Request, auth: bool = Depends(verify_auth)):
+    content_type = request.headers.get("content-type", "")
+    body = request.stream()
+    if content_type.lower().startswith("multipart/"):
+        boundary = multipart_boundary(content_type)
+        if not boundary:
+            raise HTTPException(status_code=400, detail="Multipart body without a boundary")
+        body = multipart_file(body, boundary)
+    try:
+        result = await ingest(body)
+    except UploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {**result, "note": "Copy this transcript_id for single summarize."}
+
+# -----------------------------
+# Append to a transcript
+# -----------------------------
+@app.post("/upload/append", summary="Append to Transcript", description="Append new text to an existing transcript, e.g. the latest minutes of a meeting that is still going. Only the new text is chunked; the next `/summarize` with the same instruction summarizes just the new chunks and folds them into the previous summary.")
+def upload_append(req: AppendRequest, auth: bool = Depends(verify_auth)):
+    counts = repo.append_transcript(req.transcript_id, req.transcript_text)
+    if counts is None:
+        raise HTTPException(status_code=404, detail="Transcript not found")
+    return {"transcript_id": req.transcript_id, **counts}
+
+# -----------------------------
+# Upload transcripts in bulk
+# -----------------------------
+@app.post(
+    "/upload/batch",
+    summary="Upload Transcripts (Batch)",
+    description="Upload many transcripts at once. Send JSON `{\"transcripts\": [\"...\", \"...\"]}`, or stream `application/x-ndjson` with one `{\"transcript_text\": \"...\"}` object per line. Transcript ids are returned in input order.",
+    openapi_extra={"requestBody": {"content": {
+        "application/json": {"schema": BatchUploadRequest.model_json_schema()},
+        "application/x-ndjson": {"schema": {"type": "string"}}
+    }}}
+)
+async def upload_batch(request: Request, auth: bool = Depends(verify_auth)):
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" not in content_type and "jsonl" not in content_type:
+        try:
+            req = BatchUploadRequest.model_validate(await request.json())
+        except (ValueError, ValidationError) as e:
+            raise HTTPException(status_code=422, detail=f"Invalid batch upload body: {e}")
+        ids = []
+        for i in range(0, len(req.transcripts), UPLOAD_BATCH_SIZE):
+            ids += await run_in_threadpool(repo.add_transcripts, req.transcripts[i:i + UPLOAD_BATCH_SIZE])
+        return {"count": len(ids), "transcript_ids": ids, "errors": []}
+
+    # NDJSON: parse lines as they arrive and write every UPLOAD_BATCH_SIZE transcripts
+    ids, errors, pending = [], [], []
+    buf, line_no = b"", 0
+
+    def parse(line: bytes):
+        nonlocal line_no
+        line_no += 1
+        if not line.strip():
+            return
+        try:
+            item = json.loads(line)
+            text = item if isinstance(item, str) else UploadRequest.model_validate(item).transcript_text
+            pending.append(text)
+        except (ValueError, ValidationError) as e:
+            errors.append({"line": line_no, "error": str(e)})
+
+    async for data in request.stream():
+        buf += data
+        *lines, buf = buf.split(b"\n")
+        for line in lines:
+            parse(line)
+        if len(pending) >= UPLOAD_BATCH_SIZE:
+            ids += await run_in_threadpool(repo.add_transcripts, pending)
+            pending = []
+    parse(buf)
+    if pending:
+        ids += await run_in_threadpool(repo.add_transcripts, pending)
+
+    return {"count": len(ids), "transcript_ids": ids, "errors": errors}
+
 # -----------------------------
 # Summarize transcript
 # -----------------------------
 @app.post("/summarize", response_model=SummaryResponse, summary="Summarize Transcript", description="Paste the copied `transcript_id` and add any instruction. Copy the `summary_id` from the response for saving or sharing.")
 def summarize(req: SummarizeRequest, auth: bool = Depends(verify_auth)):
-    transcript = TRANSCRIPTS.get(req.transcript_id)
-    if not transcript:
+    result = summarize_transcript(req.transcript_id, req.instruction)
+    if not result:
         raise HTTPException(status_code=404, detail="Transcript not found")
-
-    structured, editable_text = generate_summary(transcript["text"], req.instruction)
-
-    summary_id = str(uuid.uuid4())
-    summary = {
-        "id": summary_id,
-        "transcript_id": transcript["id"],
-        "structured": structured,
-        "editable_text": editable_text,
-        "generated_text": editable_text
-    }
-    SUMMARIES[summary_id] = summary
+    summary_id, structured, editable_text = result
 
     return SummaryResponse(
         summary_id=summary_id,
@@ -82,40 +250,204 @@ def summarize(req: SummarizeRequest, auth: bool = Depends(verify_auth)):
         structured=structured
     )
 
+# -----------------------------
+# Summarize transcripts in bulk
+# -----------------------------
+@app.post("/summarize/batch", response_model=BatchSummarizeResponse, summary="Summarize Transcripts (Batch)", description="Summarize many transcripts in one call. The batch runs on its own bounded pool of model calls, behind interactive requests. Returns one result per item, in order, each with either a `summary_id` or an `error`.")
+def summarize_batch(req: BatchSummarizeRequest, auth: bool = Depends(verify_auth)):
+    if len(req.items) > SUMMARIZE_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {SUMMARIZE_BATCH_MAX_ITEMS} items per batch")
+
+    chunks = repo.get_chunks_many([item.transcript_id for item in req.items])
+    todo = [i for i, item in enumerate(req.items) if item.transcript_id in chunks]
+    # Like /summarize, resume each transcript from its checkpoint for the instruction
+    keys = {i: checkpoint_key(req.items[i].instruction) for i in todo}
+    outcomes = dict(zip(todo, generate_summaries([
+        (chunks[req.items[i].transcript_id], req.items[i].instruction, repo.get_checkpoint(req.items[i].transcript_id, keys[i]))
+        for i in todo
+    ])))
+
+    # Store every successful summary in one batched write
+    succeeded = [i for i in todo if not isinstance(outcomes[i], Exception)]
+    summary_ids = dict(zip(succeeded, repo.add_summaries([
+        (req.items[i].transcript_id, *outcomes[i]) for i in succeeded
+    ])))
+    for i in succeeded:
+        tid = req.items[i].transcript_id
+        repo.save_checkpoint(tid, keys[i], len(chunks[tid]), *outcomes[i])
+
+    results = []
+    for i, item in enumerate(req.items):
+        outcome = outcomes.get(i)
+        if outcome is None:
+            results.append(BatchSummaryResult(transcript_id=item.transcript_id, error="Transcript not found"))
+        elif isinstance(outcome, Exception):
+            results.append(BatchSummaryResult(transcript_id=item.transcript_id, error=f"Summarization failed: {outcome}"))
+        else:
+            structured, editable_text = outcome
+            results.append(BatchSummaryResult(
+                transcript_id=item.transcript_id,
+                summary_id=summary_ids[i],
+                summary_text=editable_text,
+                structured=structured
+            ))
+    return BatchSummarizeResponse(results=results)
+
+# -----------------------------
+# Summarize transcript (streaming)
+# -----------------------------
+@app.post("/summarize/stream", summary="Summarize Transcript (Streaming)", description="Same as Summarize, but streams server-sent events: `progress` as each chunk finishes, `token` with editable text as it is generated, and a final `done` event carrying `summary_id` and `structured`.")
+def summarize_stream(req: SummarizeRequest, auth: bool = Depends(verify_auth)):
+    chunks = repo.get_chunks(req.transcript_id)
+    if chunks is None:
+        raise HTTPException(status_code=404, detail="Transcript not found")
+    key = checkpoint_key(req.instruction)
+    checkpoint = repo.get_checkpoint(req.transcript_id, key)
+
+    def events():
+        try:
+            for event, data in stream_summary(chunks, req.instruction, checkpoint):
+                if event == "done":
+                    repo.save_checkpoint(req.transcript_id, key, len(chunks), data["structured"], data["editable_text"])
+                    summary_id = repo.add_summary(req.transcript_id, data["structured"], data["editable_text"])
+                    data = {"summary_id": summary_id, "summary_text": data["editable_text"], "structured": data["structured"]}
+                yield sse_event(event, data)
+        except Exception as e:
+            yield sse_event("error", {"detail": f"Summarization failed: {e}"})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# -----------------------------
+# Summarize transcript (background job)
+# -----------------------------
+@app.post("/summarize/jobs", response_model=JobSubmitResponse, status_code=202, summary="Submit Summarize Job", description="Queues summarization and returns a `job_id` immediately. Poll `/summarize/jobs/{job_id}` for progress and the result.")
+def submit_summarize_job(
+    req: SummarizeRequest,
+    auth: bool = Depends(verify_auth),
+    x_username: str = Header(default=PREDEFINED_USERNAME)
+):
+    if not repo.transcript_exists(req.transcript_id):
+        raise HTTPException(status_code=404, detail="Transcript not found")
+    job_id = job_queue.submit(x_username, req.transcript_id, req.instruction)
+    return JobSubmitResponse(job_id=job_id, status="queued")
+
+@app.get("/summarize/jobs/{job_id}", response_model=JobStatusResponse, summary="Summarize Job Status", description="Reports job status (`queued`, `running`, `done`, `failed`) and progress. Once done, includes the `summary_id` and summary.")
+def get_summarize_job(job_id: str, auth: bool = Depends(verify_auth)):
+    job = job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    resp = JobStatusResponse(
+        job_id=job["id"],
+        status=job["status"],
+        transcript_id=job["transcript_id"],
+        progress=job["progress"],
+        summary_id=job["summary_id"],
+        error=job["error"]
+    )
+    summary = repo.get_summary(job["summary_id"]) if job["summary_id"] else None
+    if summary:
+        resp.summary_text = summary["editable_text"]
+        resp.structured = summary["structured"]
+    return resp
+
 # -----------------------------
 # Save/Edit summary
 # -----------------------------
-@app.put("/summary", summary="Save/Edit Summary", description="Paste the copied `summary_id` and edit the text. Click Try it out to save changes.")
+@app.put("/summary", summary="Save/Edit Summary", description="Paste the copied `summary_id` and edit the text. Click Try it out to save changes. Optionally send an edited `structured` summary too, to update its indexed action items and deadlines.")
 def save_edit(req: SaveEditRequest, auth: bool = Depends(verify_auth)):
-    summary = SUMMARIES.get(req.summary_id)
-    if not summary:
+    if not repo.update_summary_text(req.summary_id, req.edited_text, req.structured):
         raise HTTPException(status_code=404, detail="Summary not found")
-    summary["editable_text"] = req.edited_text
     return {"ok": True}
 
 # -----------------------------
 # Share summary via email
 # -----------------------------
-@app.post("/share", summary="Share Summary", description="Paste the copied `summary_id` and recipient emails. Click Try it out to share the summary via email.")
+@app.post("/share", summary="Share Summary", description="Paste the copied `summary_id` and recipient emails. Click Try it out to share the summary via email. The email is queued and sent in the background; check delivery with `GET /share/{summary_id}`.")
 def share(req: ShareRequest, auth: bool = Depends(verify_auth)):
-    summary = SUMMARIES.get(req.summary_id)
+    summary = repo.get_summary(req.summary_id)
     if not summary:
         raise HTTPException(status_code=404, detail="Summary not found")
 
     try:
-        send_email(
+        delivery_ids = outbox.enqueue(
+            summary_id=req.summary_id,
             subject="Meeting Summary",
             body=summary["editable_text"],
             recipients=req.recipients
         )
     except ValueError as ve:
         raise HTTPException(status_code=400, detail=str(ve))
-    except RuntimeError as re:
-        raise HTTPException(status_code=500, detail=str(re))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Unexpected error: {e}")
 
-    return {"ok": True, "message": f"Email sent successfully to {', '.join(req.recipients)}"}
+    return {"ok": True, "message": f"Email queued for {', '.join(req.recipients)}", "delivery_ids": delivery_ids}
+
+@app.get("/share/{summary_id}", summary="Share Status", description="Delivery status (`queued`, `sending`, `sent`, `failed`) of every email sent for a summary.")
+def share_status(summary_id: str, auth: bool = Depends(verify_auth)):
+    if not repo.get_summary(summary_id):
+        raise HTTPException(status_code=404, detail="Summary not found")
+    return {"summary_id": summary_id, "deliveries": outbox.status(summary_id)}
+
+# -----------------------------
+# Search
+# -----------------------------
+@app.get("/search", response_model=SummarySearchResponse, summary="Search Summaries", description="Full-text search over summary text. Every word must match; use \"quotes\" for phrases and a trailing * for prefixes. Sort by `relevance` or `recent`.")
+def search_summaries(
+    q: str = Query(..., min_length=1),
+    sort: Literal["relevance", "recent"] = "relevance",
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    auth: bool = Depends(verify_auth)
+):
+    try:
+        return search_index.summaries(q, limit=limit, offset=offset, sort=sort)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/search/action-items", response_model=ActionItemSearchResponse, summary="Search Action Items", description="Action items from all summaries, soonest deadline first. Filter by `owner` (case-insensitive), `status` (`open` or `done`), a `due_from`/`due_to` date range and `transcript_id`.")
+def search_action_items(
+    owner: Optional[str] = None,
+    status: Optional[Literal["open", "done"]] = None,
+    due_from: Optional[date] = None,
+    due_to: Optional[date] = None,
+    transcript_id: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    auth: bool = Depends(verify_auth)
+):
+    return search_index.action_items(
+        owner=owner, status=status, due_from=due_from, due_to=due_to,
+        transcript_id=transcript_id, limit=limit, offset=offset
+    )
+
+@app.get("/search/deadlines", response_model=DeadlineSearchResponse, summary="Search Deadlines", description="Deadlines from all summaries, soonest first, optionally within a `due_from`/`due_to` date range.")
+def search_deadlines(
+    due_from: Optional[date] = None,
+    due_to: Optional[date] = None,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    auth: bool = Depends(verify_auth)
+):
+    return search_index.deadlines(due_from=due_from, due_to=due_to, limit=limit, offset=offset)
+
+# -----------------------------
+# Summary cache statistics
+# -----------------------------
+@app.get("/cache/stats", summary="Cache Statistics", description="Hit and miss counters for the partial-summary and fused-summary caches.")
+def get_cache_stats(auth: bool = Depends(verify_auth)):
+    return cache_stats()
+
+# -----------------------------
+# Prometheus metrics
+# -----------------------------
+@app.get("/metrics", response_class=PlainTextResponse, summary="Metrics", description="Prometheus text exposition: per-stage and per-route latency histograms, Groq token usage, chunk counts, cache hits, scheduler retries and queue depths.")
+def get_metrics(auth: bool = Depends(verify_auth)):
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
 # -----------------------------
 # One-click test endpoint
@@ -123,32 +455,21 @@ def share(req: ShareRequest, auth: bool = Depends(verify_auth)):
 @app.post("/test-all", summary="One-Click Test", description="Uploads sample transcript, summarizes, edits, and shares it. Used for testing all functionalities in one click.")
 def test_all(auth: bool = Depends(verify_auth)):
     sample_text = "This is a sample meeting transcript. Discuss project deadlines and assign tasks."
-    transcript_id = str(uuid.uuid4())
-    transcript = {"id": transcript_id, "text": sample_text}
-    TRANSCRIPTS[transcript_id] = transcript
+    transcript_id = repo.add_transcript(sample_text)
 
     structured, editable_text = generate_summary(
-        transcript["text"], "Summarize the meeting into clear sections with action items."
+        sample_text, "Summarize the meeting into clear sections with action items."
     )
-
-    summary_id = str(uuid.uuid4())
-    summary = {
-        "id": summary_id,
-        "transcript_id": transcript_id,
-        "structured": structured,
-        "editable_text": editable_text,
-        "generated_text": editable_text
-    }
-    SUMMARIES[summary_id] = summary
+    summary_id = repo.add_summary(transcript_id, structured, editable_text)
 
     # Edit the summary
     edited_text = "# Updated Meeting Summary\n- Add/modify items as needed"
-    summary["editable_text"] = edited_text
+    repo.update_summary_text(summary_id, edited_text)
 
     try:
         send_email(
             subject="Meeting Summary",
-            body=summary["editable_text"],
+            body=edited_text,
             recipients=[os.getenv("SMTP_USER")]
         )
         share_status = f"Email sent successfully to {os.getenv('SMTP_USER')}"
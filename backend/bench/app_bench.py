@@ -0,0 +1,267 @@
+"""
+End-to-end API benchmarks against local fakes.
+
+Starts a fake Groq server, a fake SMTP sink and the app itself (uvicorn, in a
+thread) on free local ports, with a throwaway SQLite database, then runs:
+
+- latency: one flow at a time per transcript size, timing /upload, /summarize and /share
+- throughput: --users concurrent users, each running --flows upload -> summarize -> share
+  flows, followed by the time until the outbox has delivered every email
+
+    python -m bench.app_bench --sizes 1000 100000 1000000 --users 8 --flows 5 --out app.json
+
+The summary caches are disabled unless --cache is given, so every flow pays for
+its model calls. Prints a JSON report (and writes it to --out if given).
+"""
+import os
+import json
+import time
+import socket
+import argparse
+import tempfile
+import threading
+import statistics
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+
+from bench.fake_groq import FakeGroq
+from bench.fake_smtp import FakeSMTP
+from bench.transcripts import generate_transcript
+
+INSTRUCTION = "Summarize the meeting into clear sections with action items."
+RECIPIENTS = ["team@example.com"]
+
+
+def percentiles(samples) -> dict:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {
+        "n": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 2),
+        "p50_ms": round(pick(0.50) * 1000, 2),
+        "p95_ms": round(pick(0.95) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class Stack:
+    """
+    Fake Groq + fake SMTP + the app under uvicorn, wired together through environment variables.
+
+    The backend reads its configuration at import time, so the app is imported in
+    start(), after the environment is set; one Stack per process.
+    """
+
+    def __init__(self, groq: FakeGroq, smtp: FakeSMTP, cache: bool = False):
+        self.groq = groq
+        self.smtp = smtp
+        self.cache = cache
+        self.base_url = None
+        self._tmp = tempfile.TemporaryDirectory(prefix="ai-notes-bench-")
+        self._server = None
+        self._thread = None
+
+    def start(self) -> "Stack":
+        self.groq.start()
+        self.smtp.start()
+        smtp_host, smtp_port = self.smtp.address
+        os.environ.update({
+            "GROQ_BASE_URL": self.groq.base_url,
+            "GROQ_API_KEY": os.getenv("GROQ_API_KEY", "fake"),
+            "GROQ_RPM": str(self.groq.rpm),
+            "GROQ_TPM": str(self.groq.tpm),
+            "DATABASE_URL": f"sqlite:///{os.path.join(self._tmp.name, 'bench.db')}",
+            "SMTP_HOST": smtp_host,
+            "SMTP_PORT": str(smtp_port),
+            "SMTP_USER": "bench@example.com",
+            "SMTP_PASS": "bench",
+            "SMTP_STARTTLS": "false",
+            "SUMMARY_CACHE_PATH": "",
+        })
+        if not self.cache:
+            os.environ["SUMMARY_CACHE_SIZE"] = "0"
+
+        import uvicorn
+        from app import app
+
+        port = free_port()
+        self._server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+        self._thread.start()
+        while not self._server.started:
+            if not self._thread.is_alive():
+                raise RuntimeError("uvicorn failed to start")
+            time.sleep(0.01)
+        self.base_url = f"127.0.0.1:{port}"
+        return self
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.should_exit = True
+            self._thread.join(10)
+        self.groq.stop()
+        self.smtp.stop()
+        self._tmp.cleanup()
+
+
+class Client:
+    """
+    Keep-alive JSON client for one simulated user.
+    """
+
+    def __init__(self, base_url: str):
+        self._conn = http.client.HTTPConnection(base_url, timeout=600)
+
+    def call(self, method: str, path: str, payload: dict) -> dict:
+        body = json.dumps(payload)
+        self._conn.request(method, path, body, {"Content-Type": "application/json"})
+        resp = self._conn.getresponse()
+        data = resp.read()
+        if resp.status >= 400:
+            raise RuntimeError(f"{method} {path} -> {resp.status}: {data[:200]!r}")
+        return json.loads(data)
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def flow(client: Client, transcript: str, timings: dict) -> None:
+    """
+    One upload -> summarize -> share round trip, appending each stage's duration to timings.
+    """
+    t0 = time.perf_counter()
+    transcript_id = client.call("POST", "/upload", {"transcript_text": transcript})["transcript_id"]
+    t1 = time.perf_counter()
+    summary_id = client.call("POST", "/summarize", {"transcript_id": transcript_id, "instruction": INSTRUCTION})["summary_id"]
+    t2 = time.perf_counter()
+    client.call("POST", "/share", {"summary_id": summary_id, "recipients": RECIPIENTS})
+    t3 = time.perf_counter()
+    timings["upload"].append(t1 - t0)
+    timings["summarize"].append(t2 - t1)
+    timings["share"].append(t3 - t2)
+    timings["flow"].append(t3 - t0)
+
+
+def run_latency(stack: Stack, sizes, repeats: int = 3) -> list:
+    results = []
+    client = Client(stack.base_url)
+    for size in sizes:
+        timings = {"upload": [], "summarize": [], "share": [], "flow": []}
+        calls_before = stack.groq.stats["ok"]
+        for i in range(repeats):
+            flow(client, generate_transcript(size, seed=i), timings)
+        results.append({
+            "bytes": size,
+            "repeats": repeats,
+            "model_calls_per_flow": round((stack.groq.stats["ok"] - calls_before) / repeats, 1),
+            **{stage: percentiles(samples) for stage, samples in timings.items()},
+        })
+    client.close()
+    return results
+
+
+def run_throughput(stack: Stack, users: int, flows: int, size: int, delivery_timeout: float = 120.0) -> dict:
+    timings = {"upload": [], "summarize": [], "share": [], "flow": []}
+    errors = []
+    lock = threading.Lock()
+    delivered_before = stack.smtp.stats["messages"]
+
+    def user(u: int) -> None:
+        client = Client(stack.base_url)
+        local = {stage: [] for stage in timings}
+        for i in range(flows):
+            try:
+                flow(client, generate_transcript(size, seed=1000 * (u + 1) + i), local)
+            except Exception as e:
+                local.setdefault("errors", []).append(str(e))
+        client.close()
+        with lock:
+            for stage in timings:
+                timings[stage] += local[stage]
+            errors.extend(local.get("errors", []))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(users) as pool:
+        list(pool.map(user, range(users)))
+    elapsed = time.perf_counter() - start
+    completed = len(timings["flow"])
+    all_delivered = stack.smtp.wait_for(delivered_before + completed, delivery_timeout)
+    delivered_after = time.perf_counter() - start
+
+    return {
+        "users": users,
+        "flows_per_user": flows,
+        "bytes": size,
+        "completed": completed,
+        "errors": len(errors),
+        "error_samples": errors[:5],
+        "elapsed_s": round(elapsed, 3),
+        "flows_per_s": round(completed / elapsed, 3) if elapsed else None,
+        "all_delivered": all_delivered,
+        "delivered_s": round(delivered_after, 3),
+        **{stage: percentiles(samples) for stage, samples in timings.items()},
+    }
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000], help="transcript sizes (bytes) for the latency scenario")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--users", type=int, default=8)
+    parser.add_argument("--flows", type=int, default=5, help="flows per user in the throughput scenario")
+    parser.add_argument("--flow-size", type=int, default=20_000, help="transcript size (bytes) in the throughput scenario")
+    parser.add_argument("--groq-latency", type=float, default=0.05)
+    parser.add_argument("--groq-tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--groq-rpm", type=int, default=0)
+    parser.add_argument("--groq-tpm", type=int, default=0)
+    parser.add_argument("--groq-error-rate", type=float, default=0.0, help="fraction of model calls answered with a random 429")
+    parser.add_argument("--smtp-latency", type=float, default=0.01)
+    parser.add_argument("--cache", action="store_true", help="keep the summary caches enabled")
+
+
+def run(args) -> dict:
+    groq = FakeGroq(
+        rpm=args.groq_rpm,
+        tpm=args.groq_tpm,
+        latency=args.groq_latency,
+        tokens_per_second=args.groq_tokens_per_second,
+        error_rate=args.groq_error_rate
+    )
+    stack = Stack(groq, FakeSMTP(latency=args.smtp_latency), cache=args.cache).start()
+    try:
+        latency = run_latency(stack, args.sizes, args.repeats)
+        throughput = run_throughput(stack, args.users, args.flows, args.flow_size)
+    finally:
+        stack.stop()
+    return {
+        "benchmark": "app",
+        "config": {k: v for k, v in vars(args).items() if k != "out"},
+        "latency": latency,
+        "throughput": throughput,
+        "fake_groq": groq.stats,
+        "fake_smtp": stack.smtp.stats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(parser)
+    parser.add_argument("--out", help="write the JSON report here as well as to stdout")
+    args = parser.parse_args()
+
+    text = json.dumps(run(args), indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
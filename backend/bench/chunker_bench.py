@@ -0,0 +1,84 @@
+"""
+Chunker microbenchmark: throughput and chunk-size spread on synthetic transcripts.
+
+    python -m bench.chunker_bench --sizes 100000 1000000 5000000 --out chunker.json
+
+Compares the streaming chunker (whole string and 64 KB pieces) with the previous
+split-on-". " implementation. Chunk sizes are measured with chunking.count_tokens.
+"""
+import json
+import time
+import argparse
+import statistics
+
+from chunking import count_tokens, iter_chunks, CHUNK_TARGET_TOKENS
+from bench.transcripts import generate_transcript, iter_pieces
+
+
+def legacy_chunks(text: str, target_tokens: int = 1200) -> list:
+    # The original smart_chunks, kept as the baseline
+    sents = text.replace("\r", " ").split(". ")
+    chunks, cur, cur_len = [], [], 0
+    for s in sents:
+        l = max(1, len(s) // 4)
+        if cur_len + l > target_tokens and cur:
+            chunks.append(". ".join(cur))
+            cur, cur_len = [s], l
+        else:
+            cur.append(s); cur_len += l
+    if cur:
+        chunks.append(". ".join(cur))
+    return chunks
+
+
+def measure(name: str, fn, text: str, target: int) -> dict:
+    start = time.perf_counter()
+    chunks = fn()
+    elapsed = time.perf_counter() - start
+    sizes = [count_tokens(c) for c in chunks]
+    mean = statistics.fmean(sizes)
+    stdev = statistics.pstdev(sizes)
+    return {
+        "chunker": name,
+        "bytes": len(text),
+        "chunks": len(chunks),
+        "seconds": round(elapsed, 4),
+        "mb_per_s": round(len(text) / 1e6 / elapsed, 2) if elapsed else None,
+        "tokens_mean": round(mean, 1),
+        "tokens_stdev": round(stdev, 1),
+        "tokens_cv": round(stdev / mean, 3) if mean else None,
+        "tokens_min": min(sizes),
+        "tokens_max": max(sizes),
+        "over_target": sum(1 for n in sizes if n > target),
+    }
+
+
+def run(sizes, target: int = CHUNK_TARGET_TOKENS, overlap: int = 0) -> list:
+    results = []
+    for size in sizes:
+        text = generate_transcript(size)
+        results.append(measure("legacy", lambda: legacy_chunks(text, target), text, target))
+        results.append(measure("stream", lambda: list(iter_chunks(text, target, overlap)), text, target))
+        results.append(measure("stream-64k-pieces", lambda: list(iter_chunks(iter_pieces(text), target, overlap)), text, target))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000, 5_000_000])
+    parser.add_argument("--target", type=int, default=CHUNK_TARGET_TOKENS)
+    parser.add_argument("--overlap", type=int, default=0)
+    parser.add_argument("--out", help="write the JSON report here as well as to stdout")
+    args = parser.parse_args()
+
+    report = {"benchmark": "chunker", "target_tokens": args.target, "overlap_tokens": args.overlap,
+              "results": run(args.sizes, args.target, args.overlap)}
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
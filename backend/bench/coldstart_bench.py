@@ -0,0 +1,152 @@
+"""
+Import-time and cold-start benchmarks for the api/index.py entry point.
+
+Every run starts a fresh Python process, as a serverless cold start would:
+
+- import: time to `import index`, the cumulative import time of the heaviest
+  dependencies (from -X importtime), and whether the Groq SDK was loaded
+- serve: `uvicorn index:app` against a new SQLite database, timing process start
+  to the first response (GET /cache/stats), then the first request that touches
+  the database (POST /upload) and the first model call (POST /summarize, against
+  bench.fake_groq)
+
+    python -m bench.coldstart_bench --runs 5 --out coldstart.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+import http.client
+
+from bench.app_bench import free_port, percentiles
+from bench.fake_groq import FakeGroq
+
+API_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "api"))
+# Modules whose cumulative import time is reported
+WATCHED_MODULES = ("fastapi", "pydantic", "sqlalchemy", "groq", "dotenv", "models", "database", "llm", "app")
+
+IMPORT_SCRIPT = """
+import sys, time, json
+sys.path.insert(0, {api_dir!r})
+start = time.perf_counter()
+import index
+print(json.dumps({{"seconds": time.perf_counter() - start, "groq_loaded": "groq" in sys.modules}}))
+"""
+
+
+def bench_env(tmp: str, groq_url: str = "http://127.0.0.1:9") -> dict:
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'coldstart.db')}",
+        "GROQ_API_KEY": os.getenv("GROQ_API_KEY", "fake"),
+        "GROQ_BASE_URL": groq_url,
+        "SUMMARY_CACHE_PATH": "",
+        "SUMMARY_CACHE_SIZE": "0",
+    })
+    return env
+
+
+def import_once(tmp: str) -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", IMPORT_SCRIPT.format(api_dir=API_DIR)],
+        capture_output=True, text=True, check=True, cwd=tmp, env=bench_env(tmp)
+    )
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    modules = {}
+    for line in proc.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() in WATCHED_MODULES:
+            name, cumulative = parts[2].strip(), int(parts[1])
+            modules[name] = max(modules.get(name, 0), cumulative)
+    result["modules_ms"] = {name: round(us / 1000, 1) for name, us in sorted(modules.items(), key=lambda m: -m[1])}
+    return result
+
+
+def request(port: int, method: str, path: str, body: dict = None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    try:
+        conn.request(method, path, json.dumps(body) if body else None, {"Content-Type": "application/json"})
+        resp = conn.getresponse()
+        return resp.status, json.loads(resp.read() or b"null")
+    finally:
+        conn.close()
+
+
+def serve_once(tmp: str, groq: FakeGroq, timeout: float = 60.0) -> dict:
+    port = free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "index:app", "--app-dir", API_DIR,
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=tmp, env=bench_env(tmp, groq.base_url)
+    )
+    try:
+        while True:
+            if proc.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with {proc.returncode}")
+            if time.perf_counter() - start > timeout:
+                raise RuntimeError("app did not answer in time")
+            try:
+                if request(port, "GET", "/cache/stats")[0] == 200:
+                    break
+            except OSError:
+                time.sleep(0.005)
+        first_response = time.perf_counter() - start
+
+        t = time.perf_counter()
+        _, data = request(port, "POST", "/upload", {"transcript_text": "Alice: kickoff. Bob: ship it by Friday."})
+        first_upload = time.perf_counter() - t
+
+        t = time.perf_counter()
+        status, _ = request(port, "POST", "/summarize", {"transcript_id": data["transcript_id"], "instruction": "Summarize."})
+        first_summarize = time.perf_counter() - t
+        if status != 200:
+            raise RuntimeError(f"/summarize returned {status}")
+        return {"first_response": first_response, "first_upload": first_upload, "first_summarize": first_summarize}
+    finally:
+        proc.terminate()
+        proc.wait(10)
+
+
+def run(runs: int = 5) -> dict:
+    imports, serves = [], []
+    groq = FakeGroq(latency=0.0).start()
+    try:
+        for _ in range(runs):
+            with tempfile.TemporaryDirectory(prefix="ai-notes-coldstart-") as tmp:
+                imports.append(import_once(tmp))
+            with tempfile.TemporaryDirectory(prefix="ai-notes-coldstart-") as tmp:
+                serves.append(serve_once(tmp, groq))
+    finally:
+        groq.stop()
+    return {
+        "benchmark": "coldstart",
+        "runs": runs,
+        "import": percentiles([r["seconds"] for r in imports]),
+        "groq_loaded_on_import": any(r["groq_loaded"] for r in imports),
+        "import_modules_ms": imports[-1]["modules_ms"],
+        "time_to_first_response": percentiles([r["first_response"] for r in serves]),
+        "first_upload": percentiles([r["first_upload"] for r in serves]),
+        "first_summarize": percentiles([r["first_summarize"] for r in serves]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--out", help="write the JSON report here as well as to stdout")
+    args = parser.parse_args()
+
+    text = json.dumps(run(args.runs), indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Local stand-in for Groq's OpenAI-compatible chat completions API.
+
+Enforces requests/tokens-per-minute quotas with a sliding 60 s window and answers
+over-quota calls with 429 + retry-after, like the real service. Latency, token
+throughput and an optional random 429 rate are configurable.
+
+    python -m bench.fake_groq --port 8100 --rpm 30 --tpm 6000 --latency 0.2
+
+then point the backend at it with GROQ_BASE_URL=http://127.0.0.1:8100.
+"""
+import json
+import time
+import random
+import argparse
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def count_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class FakeGroq:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        rpm: int = 0,
+        tpm: int = 0,
+        latency: float = 0.05,
+        tokens_per_second: float = 0.0,
+        completion_tokens: int = 120,
+        error_rate: float = 0.0
+    ):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.error_rate = error_rate
+        self.stats = {"requests": 0, "ok": 0, "rate_limited": 0, "prompt_tokens": 0, "completion_tokens": 0}
+        self._window = deque()  # (timestamp, tokens) of accepted requests
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeGroq":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    # -----------------------------
+    # Quota
+    # -----------------------------
+    def admit(self, tokens: int):
+        """
+        Return None if the call fits the quota, else the seconds until it would.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self.stats["requests"] += 1
+            while self._window and now - self._window[0][0] >= 60:
+                self._window.popleft()
+            if self.error_rate and random.random() < self.error_rate:
+                self.stats["rate_limited"] += 1
+                return 1.0
+            used = sum(t for _, t in self._window)
+            over_rpm = self.rpm and len(self._window) + 1 > self.rpm
+            over_tpm = self.tpm and used + tokens > self.tpm
+            if over_rpm or over_tpm:
+                self.stats["rate_limited"] += 1
+                return max(0.05, 60 - (now - self._window[0][0])) if self._window else 1.0
+            self._window.append((now, tokens))
+            return None
+
+    # -----------------------------
+    # Replies
+    # -----------------------------
+    def reply_for(self, messages) -> str:
+        system = messages[0]["content"] if messages else ""
+        words = " ".join(m["content"] for m in messages[1:]).split()
+        gist = " ".join(words[-self.completion_tokens:])
+        if "JSON" in system:
+            return json.dumps({
+                "overview": gist,
+                "agenda": ["Review progress"],
+                "decisions": ["Proceed with plan"],
+                "action_items": [{"task": "Follow up", "owner": "Alex", "deadline": "2025-01-31", "status": "open"}],
+                "owners": ["Alex"],
+                "deadlines": [{"item": "Follow up", "deadline": "2025-01-31"}],
+                "risks": [],
+                "open_questions": []
+            })
+        return gist
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, status, payload, headers=None):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                if not self.path.endswith("/chat/completions"):
+                    return self._send_json(404, {"error": {"message": "not found"}})
+                req = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                messages = req.get("messages", [])
+                prompt_tokens = sum(count_tokens(m.get("content", "")) for m in messages)
+
+                wait = fake.admit(prompt_tokens + fake.completion_tokens)
+                if wait is not None:
+                    return self._send_json(
+                        429,
+                        {"error": {"message": "Rate limit reached", "type": "tokens", "code": "rate_limit_exceeded"}},
+                        {"retry-after": f"{wait:.2f}"}
+                    )
+
+                content = fake.reply_for(messages)
+                completion_tokens = count_tokens(content)
+                time.sleep(fake.latency)
+                with fake._lock:
+                    fake.stats["ok"] += 1
+                    fake.stats["prompt_tokens"] += prompt_tokens
+                    fake.stats["completion_tokens"] += completion_tokens
+                usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+                base = {"id": "chatcmpl-fake", "created": int(time.time()), "model": req.get("model", "fake")}
+
+                if not req.get("stream"):
+                    if fake.tokens_per_second:
+                        time.sleep(completion_tokens / fake.tokens_per_second)
+                    return self._send_json(200, dict(base, object="chat.completion", choices=[
+                        {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}
+                    ], usage=usage))
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                step = 16
+                for i in range(0, len(content), step):
+                    if fake.tokens_per_second:
+                        time.sleep(count_tokens(content[i:i + step]) / fake.tokens_per_second)
+                    chunk = dict(base, object="chat.completion.chunk", choices=[
+                        {"index": 0, "delta": {"content": content[i:i + step]}, "finish_reason": None}
+                    ])
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                    self.wfile.flush()
+                done = dict(base, object="chat.completion.chunk", choices=[
+                    {"index": 0, "delta": {}, "finish_reason": "stop"}
+                ], x_groq={"usage": usage})
+                self.wfile.write(f"data: {json.dumps(done)}\n\ndata: [DONE]\n\n".encode())
+                self.wfile.flush()
+                self.close_connection = True
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--rpm", type=int, default=0, help="requests per minute, 0 = unlimited")
+    parser.add_argument("--tpm", type=int, default=0, help="tokens per minute, 0 = unlimited")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="completion throughput, 0 = instant")
+    parser.add_argument("--completion-tokens", type=int, default=120)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls answered with a random 429")
+    args = parser.parse_args()
+
+    fake = FakeGroq(args.host, args.port, args.rpm, args.tpm, args.latency, args.tokens_per_second, args.completion_tokens, args.error_rate)
+    print(f"Fake Groq listening on {fake.base_url}")
+    try:
+        fake._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
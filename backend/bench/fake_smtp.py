@@ -0,0 +1,151 @@
+"""
+Local SMTP sink for benchmarks.
+
+Speaks just enough SMTP for the outbox (EHLO, AUTH PLAIN/LOGIN, MAIL, RCPT, DATA,
+RSET, NOOP, QUIT), accepts any credentials and discards messages after counting
+them. Per-message latency and a random 451 rate are configurable.
+
+    python -m bench.fake_smtp --port 2525 --latency 0.05
+
+then point the backend at it with SMTP_HOST=127.0.0.1 SMTP_PORT=2525
+SMTP_STARTTLS=false and any SMTP_USER/SMTP_PASS.
+"""
+import time
+import random
+import argparse
+import threading
+import socketserver
+
+
+class FakeSMTP:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0, error_rate: float = 0.0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.stats = {"connections": 0, "messages": 0, "recipients": 0, "bytes": 0, "rejected": 0}
+        self._lock = threading.Lock()
+        self._server = socketserver.ThreadingTCPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def address(self):
+        return self._server.server_address[:2]
+
+    def start(self) -> "FakeSMTP":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def count(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self.stats[key] += n
+
+    def wait_for(self, messages: int, timeout: float = 60.0) -> bool:
+        """
+        Block until at least this many messages were accepted; False on timeout.
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.stats["messages"] >= messages:
+                return True
+            time.sleep(0.02)
+        return False
+
+    def _handler(self):
+        fake = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, *lines: str) -> None:
+                self.wfile.write("".join(f"{line}\r\n" for line in lines).encode())
+                self.wfile.flush()
+
+            def handle(self):
+                fake.count("connections")
+                self.reply("220 fake-smtp ready")
+                recipients, size, in_data = 0, 0, False
+                while True:
+                    line = self.rfile.readline()
+                    if not line:
+                        return
+                    if in_data:
+                        if line.rstrip(b"\r\n") != b".":
+                            size += len(line)
+                            continue
+                        in_data = False
+                        if fake.latency:
+                            time.sleep(fake.latency)
+                        if fake.error_rate and random.random() < fake.error_rate:
+                            fake.count("rejected")
+                            self.reply("451 4.3.0 Temporary failure, try again later")
+                        else:
+                            fake.count("messages")
+                            fake.count("recipients", recipients)
+                            fake.count("bytes", size)
+                            self.reply("250 2.0.0 Accepted")
+                        recipients, size = 0, 0
+                        continue
+
+                    parts = line.decode(errors="replace").strip().split()
+                    verb = parts[0].upper() if parts else ""
+                    if verb == "EHLO":
+                        self.reply("250-fake-smtp", "250-AUTH PLAIN LOGIN", "250 8BITMIME")
+                    elif verb == "HELO":
+                        self.reply("250 fake-smtp")
+                    elif verb == "AUTH":
+                        mechanism = parts[1].upper() if len(parts) > 1 else ""
+                        if mechanism == "LOGIN":
+                            # The username may come with the command; the password is always prompted for
+                            if len(parts) <= 2:
+                                self.reply("334 VXNlcm5hbWU6")
+                                self.rfile.readline()
+                            self.reply("334 UGFzc3dvcmQ6")
+                            self.rfile.readline()
+                        elif mechanism == "PLAIN" and len(parts) <= 2:
+                            self.reply("334 ")
+                            self.rfile.readline()
+                        self.reply("235 2.7.0 Authentication successful")
+                    elif verb == "MAIL":
+                        recipients, size = 0, 0
+                        self.reply("250 2.1.0 OK")
+                    elif verb == "RCPT":
+                        recipients += 1
+                        self.reply("250 2.1.5 OK")
+                    elif verb == "DATA":
+                        in_data = True
+                        self.reply("354 End data with <CR><LF>.<CR><LF>")
+                    elif verb == "RSET":
+                        recipients, size = 0, 0
+                        self.reply("250 2.0.0 OK")
+                    elif verb == "NOOP":
+                        self.reply("250 2.0.0 OK")
+                    elif verb == "QUIT":
+                        self.reply("221 2.0.0 Bye")
+                        return
+                    else:
+                        self.reply("502 5.5.2 Command not recognized")
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2525)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to accept each message")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of messages answered with a 451")
+    args = parser.parse_args()
+
+    fake = FakeSMTP(args.host, args.port, args.latency, args.error_rate)
+    print(f"Fake SMTP listening on {fake.address[0]}:{fake.address[1]}")
+    try:
+        fake._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
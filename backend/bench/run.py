@@ -0,0 +1,64 @@
+"""
+Run the benchmark suite and write one JSON report, tagged with the git commit.
+
+    python -m bench.run --out bench-results/$(git rev-parse --short HEAD).json
+
+Runs the chunker microbenchmarks, the cold-start benchmark (bench.coldstart_bench)
+and the end-to-end API scenarios (see bench.app_bench for the options). Pass
+--skip-chunker, --skip-coldstart or --skip-app to run only part of the suite; compare reports from different commits to spot regressions.
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import subprocess
+
+from bench import app_bench, chunker_bench, coldstart_bench
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    app_bench.add_arguments(parser)
+    parser.add_argument("--chunker-sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000, 10_000_000])
+    parser.add_argument("--coldstart-runs", type=int, default=5)
+    parser.add_argument("--skip-app", action="store_true")
+    parser.add_argument("--skip-coldstart", action="store_true")
+    parser.add_argument("--skip-chunker", action="store_true")
+    parser.add_argument("--out", help="write the JSON report here as well as to stdout")
+    args = parser.parse_args()
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+    }
+    if not args.skip_chunker:
+        report["chunker"] = chunker_bench.run(args.chunker_sizes)
+    if not args.skip_coldstart:
+        report["coldstart"] = coldstart_bench.run(args.coldstart_runs)
+    if not args.skip_app:
+        report["app"] = app_bench.run(args)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Throughput of the Groq scheduler against a quota-enforcing fake Groq server.
+
+    python -m bench.scheduler_bench --rpm 60 --calls 90 --threads 16
+
+Prints a JSON report with successful calls per minute against the quota and how
+many 429s the fake server handed out. Pass --client-rpm 0 to disable the
+client-side bucket and rely on 429 backoff alone.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from bench.fake_groq import FakeGroq
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rpm", type=int, default=60, help="server quota, requests per minute")
+    parser.add_argument("--tpm", type=int, default=0, help="server quota, tokens per minute")
+    parser.add_argument("--client-rpm", type=int, default=None, help="scheduler RPM budget (defaults to --rpm)")
+    parser.add_argument("--client-tpm", type=int, default=None, help="scheduler TPM budget (defaults to --tpm)")
+    parser.add_argument("--calls", type=int, default=90)
+    parser.add_argument("--threads", type=int, default=16)
+    args = parser.parse_args()
+
+    fake = FakeGroq(rpm=args.rpm, tpm=args.tpm, latency=0.02).start()
+    os.environ.update({
+        "GROQ_BASE_URL": fake.base_url,
+        "GROQ_API_KEY": os.getenv("GROQ_API_KEY", "fake"),
+        "GROQ_RPM": str(args.rpm if args.client_rpm is None else args.client_rpm),
+        "GROQ_TPM": str(args.tpm if args.client_tpm is None else args.client_tpm),
+    })
+    import llm
+
+    def one(i):
+        try:
+            llm.call_groq([{"role": "system", "content": "bench"}, {"role": "user", "content": f"call {i} " + "word " * 200}])
+            return True
+        except Exception as e:
+            print(f"call {i} failed: {e}", file=sys.stderr)
+            return False
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.threads) as pool:
+        ok = sum(pool.map(one, range(args.calls)))
+    elapsed = time.perf_counter() - start
+    fake.stop()
+
+    print(json.dumps({
+        "calls": args.calls,
+        "succeeded": ok,
+        "elapsed_s": round(elapsed, 3),
+        "server_429s": fake.stats["rate_limited"],
+        "succeeded_per_min": round(ok / elapsed * 60, 2),
+        "quota_rpm": args.rpm,
+        "scheduler": llm.scheduler.stats,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Synthetic meeting transcripts for benchmarks.
+
+Produces speaker-labelled, timestamped turns of varying length with questions,
+decisions, action items and the occasional long run-on utterance, so chunk
+boundaries and token counts look like real recordings.
+"""
+import random
+
+SPEAKERS = ["Alice", "Bob", "Priya Shah", "Carlos", "Speaker 5", "Dr. Mei Lin"]
+OPENERS = [
+    "So the next item is", "I think we should look at", "Quick update on", "Can we revisit",
+    "Following up on", "My concern with", "Let's decide on", "The customer asked about",
+]
+TOPICS = [
+    "the Q3 roadmap", "the billing migration", "onboarding latency", "the hiring plan",
+    "vendor contracts", "the mobile release", "incident 4821", "the analytics dashboard",
+]
+TAILS = [
+    "and I'd like a decision today.", "because the deadline is March 14.", "which is blocked on legal?",
+    "so Bob will own the follow-up by Friday.", "since the numbers look off by about 12%.",
+    "does anyone disagree?", "and we agreed to ship it next sprint.", "but we still need sign-off!",
+]
+
+
+def utterance(rng: random.Random) -> str:
+    sentences = []
+    for _ in range(rng.choice([1, 1, 2, 3, 5, 8])):
+        sentences.append(f"{rng.choice(OPENERS)} {rng.choice(TOPICS)} {rng.choice(TAILS)}")
+    if rng.random() < 0.03:
+        # Run-on utterance with no sentence punctuation at all
+        sentences.append(" ".join(rng.choice(TOPICS) for _ in range(rng.randint(50, 400))))
+    return " ".join(sentences)
+
+
+def generate_transcript(size_bytes: int, seed: int = 0) -> str:
+    """
+    Return a transcript of roughly size_bytes characters.
+    """
+    rng = random.Random(seed)
+    lines, total, seconds = [], 0, 0
+    while total < size_bytes:
+        seconds += rng.randint(2, 40)
+        h, rem = divmod(seconds, 3600)
+        m, s = divmod(rem, 60)
+        line = f"[{h:02d}:{m:02d}:{s:02d}] {rng.choice(SPEAKERS)}: {utterance(rng)}"
+        lines.append(line)
+        total += len(line) + 1
+    return "\n".join(lines)[:size_bytes]
+
+
+def iter_pieces(text: str, piece_size: int = 64 * 1024):
+    """
+    Yield text in fixed-size pieces, as a streamed upload would deliver it.
+    """
+    for i in range(0, len(text), piece_size):
+        yield text[i:i + piece_size]
@@ -0,0 +1,133 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict
+
+
+def cache_key(*parts: str) -> str:
+    """
+    Content-addressed key: sha256 over the parts, separated so ("ab", "c") != ("a", "bc").
+    """
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class SummaryCache:
+    """
+    Thread-safe LRU cache of model outputs with optional TTL.
+
+    When `path` is set, entries are also written to an SQLite file so they
+    survive restarts; the in-memory LRU acts as the hot layer in front of it.
+    """
+
+    # How many writes between sweeps of expired/excess rows on disk
+    PRUNE_EVERY = 256
+
+    def __init__(self, name: str, max_entries: int = 2048, ttl: Optional[float] = None, path: Optional[str] = None):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._mem = OrderedDict()  # key -> (created_at, value)
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._db = None
+        self._table = f"cache_{name}"
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                f"CREATE TABLE IF NOT EXISTS {self._table} "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl is not None and now - created_at > self.ttl
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is not None:
+                if not self._expired(entry[0], now):
+                    self._mem.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._mem[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    f"SELECT value, created_at FROM {self._table} WHERE key = ?", (key,)
+                ).fetchone()
+                if row and not self._expired(row[1], now):
+                    self._put_mem(key, row[1], row[0])
+                    self.hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._put_mem(key, now, value)
+            if self._db is not None:
+                self._db.execute(
+                    f"INSERT OR REPLACE INTO {self._table} (key, value, created_at) VALUES (?, ?, ?)",
+                    (key, value, now)
+                )
+                self._writes += 1
+                if self._writes % self.PRUNE_EVERY == 0:
+                    self._prune_disk(now)
+                self._db.commit()
+
+    def _put_mem(self, key: str, created_at: float, value: str) -> None:
+        self._mem[key] = (created_at, value)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)
+
+    def _prune_disk(self, now: float) -> None:
+        if self.ttl is not None:
+            self._db.execute(f"DELETE FROM {self._table} WHERE created_at < ?", (now - self.ttl,))
+        # Keep the on-disk layer bounded too (oldest first); allow it to be larger than memory
+        self._db.execute(
+            f"DELETE FROM {self._table} WHERE key NOT IN "
+            f"(SELECT key FROM {self._table} ORDER BY created_at DESC LIMIT ?)",
+            (self.max_entries * 8,)
+        )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            self.hits = self.misses = 0
+            if self._db is not None:
+                self._db.execute(f"DELETE FROM {self._table}")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._mem)}
+
+
+def make_cache(name: str) -> SummaryCache:
+    """
+    Build a cache configured from the environment:
+    SUMMARY_CACHE_SIZE (entries), SUMMARY_CACHE_TTL (seconds, 0 = never expire)
+    and SUMMARY_CACHE_PATH (SQLite file; unset keeps the cache in memory only).
+    """
+    ttl = float(os.getenv("SUMMARY_CACHE_TTL", "86400"))
+    return SummaryCache(
+        name,
+        max_entries=int(os.getenv("SUMMARY_CACHE_SIZE", "2048")),
+        ttl=ttl or None,
+        path=os.getenv("SUMMARY_CACHE_PATH") or None
+    )
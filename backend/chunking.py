@@ -1,16 +1,194 @@
-import textwrap
-
-def smart_chunks(text: str, target_tokens: int = 1200) -> list:
-    # naive length based chunking with sentence boundaries
-    sents = text.replace("\r", " ").split(". ")
-    chunks, cur, cur_len = [], [], 0
-    for s in sents:
-        l = max(1, len(s) // 4)
-        if cur_len + l > target_tokens and cur:
-            chunks.append(". ".join(cur))
-            cur, cur_len = [s], l
-        else:
-            cur.append(s); cur_len += l
-    if cur:
-        chunks.append(". ".join(cur))
+import os
+import re
+from typing import Iterable, Iterator, List, Optional, Union
+
+import metrics
+
+# Chunk size and the tail of each chunk repeated at the start of the next one
+CHUNK_TARGET_TOKENS = int(os.getenv("CHUNK_TARGET_TOKENS", "1200"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "0"))
+
+CHUNKS_PER_TRANSCRIPT = metrics.histogram(
+    "ai_notes_chunks_per_transcript", "Chunks produced per chunked text.",
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+)
+
+# -----------------------------
+# Token counting
+# -----------------------------
+# Approximates BPE tokenizers (llama / cl100k) without a vocabulary: English prose
+# averages about 1.2 tokens per whitespace-separated word, plus one per symbol.
+# Set CHUNK_TOKENIZER=tiktoken to count with tiktoken instead.
+_SYMBOL_RE = re.compile(r"[^\w\s]")
+
+_encoder = None
+_encoder_loaded = False
+
+
+def _tiktoken_encoder():
+    global _encoder, _encoder_loaded
+    if not _encoder_loaded:
+        _encoder_loaded = True
+        if os.getenv("CHUNK_TOKENIZER") == "tiktoken":
+            try:
+                import tiktoken
+                _encoder = tiktoken.get_encoding("cl100k_base")
+            except Exception:
+                _encoder = None
+    return _encoder
+
+
+def count_tokens(text: str) -> int:
+    encoder = _tiktoken_encoder()
+    if encoder is not None:
+        return max(1, len(encoder.encode(text, disallowed_special=())))
+    return max(1, (len(text.split()) * 6 + 4) // 5 + len(_SYMBOL_RE.findall(text)))
+
+
+# -----------------------------
+# Boundaries
+# -----------------------------
+# A segment ends after sentence punctuation followed by whitespace, or after a line break
+# (written to start on a single character class so the regex engine can scan quickly)
+_BOUNDARY_RE = re.compile(r"[.!?\r\n](?:(?<=[\r\n])\s*|[.!?]*[\"')\]]*[ \t]+)")
+# Segments that open a speaker turn ("Alice:", "Speaker 2:") or carry a timestamp ("[00:12:31]", "00:12 -->")
+_TURN_RE = re.compile(r"\s*(?:[\[(]?\d{1,2}:\d{2}(?::\d{2})?(?:[.,]\d+)?[\])]?|[A-Z][\w.'-]*(?: [\w.'-]+){0,3}:\s)")
+
+
+def _hard_split(text: str, tokens: int, target_tokens: int) -> Iterator[str]:
+    """
+    Split an oversized boundary-free segment into pieces of roughly target_tokens, on whitespace where possible.
+    """
+    step = max(1, int(len(text) * target_tokens * 0.9 / tokens))
+    pos = 0
+    while pos < len(text):
+        end = min(len(text), pos + step)
+        if end < len(text):
+            space = text.rfind(" ", pos + step // 2, end)
+            if space > pos:
+                end = space + 1
+        yield text[pos:end]
+        pos = end
+
+
+class ChunkStream:
+    """
+    Single-pass, incremental chunker.
+
+    feed() accepts text in arbitrary pieces (e.g. as bytes arrive) and returns the
+    chunks completed so far; close() flushes the rest. Chunks are packed greedily
+    up to target_tokens from boundary-delimited segments. When a chunk overflows,
+    it is cut before the most recent speaker turn or timestamp if that keeps it at
+    least three quarters full. The last overlap_tokens of each chunk are repeated at the
+    start of the next one.
+    """
+
+    def __init__(self, target_tokens: int = CHUNK_TARGET_TOKENS, overlap_tokens: int = CHUNK_OVERLAP_TOKENS):
+        self.target_tokens = target_tokens
+        self.overlap_tokens = min(overlap_tokens, target_tokens // 2)
+        self._buf = ""
+        self._segs = []  # (text, tokens, starts_turn)
+        self._tokens = 0
+        self._carried = 0  # leading segments repeated from the previous chunk
+        # Force a split when this many characters arrive without any boundary
+        self._max_buf = max(4096, target_tokens * 16)
+
+    def feed(self, text: str) -> List[str]:
+        out = []
+        self._buf += text
+        last = 0
+        for m in _BOUNDARY_RE.finditer(self._buf):
+            # A match touching the end of the buffer may still grow with the next piece
+            if m.end() >= len(self._buf):
+                break
+            self._add(self._split_long(self._buf[last:m.end()], out), out)
+            last = m.end()
+        self._buf = self._split_long(self._buf[last:], out)
+        return out
+
+    def _split_long(self, seg: str, out: List[str]) -> str:
+        """
+        Add max_buf-sized pieces from the front of an overlong segment and return the rest.
+        Segments are cut this way whether their end has arrived yet or not, so the
+        chunks do not depend on how the text was split into pieces.
+        """
+        while len(seg) > self._max_buf:
+            cut = seg.rfind(" ", 0, self._max_buf) + 1 or self._max_buf
+            self._add(seg[:cut], out)
+            seg = seg[cut:]
+        return seg
+
+    def close(self) -> List[str]:
+        out = []
+        if self._buf:
+            self._add(self._buf, out)
+            self._buf = ""
+        if len(self._segs) > self._carried:
+            self._emit(len(self._segs), out)
+        self._segs, self._tokens, self._carried = [], 0, 0
+        return out
+
+    def _add(self, seg: str, out: List[str], tokens: Optional[int] = None) -> None:
+        n = count_tokens(seg) if tokens is None else tokens
+        if n > self.target_tokens and tokens is None:
+            for piece in _hard_split(seg, n, self.target_tokens):
+                self._add(piece, out, count_tokens(piece))
+            return
+
+        while len(self._segs) > self._carried and self._tokens + n > self.target_tokens:
+            self._cut(out)
+        # Only overlap left and it does not fit alongside this segment: shed it from the front
+        while self._segs and self._tokens + n > self.target_tokens:
+            self._tokens -= self._segs.pop(0)[1]
+            self._carried -= 1
+
+        self._segs.append((seg, n, bool(_TURN_RE.match(seg))))
+        self._tokens += n
+
+    def _cut(self, out: List[str]) -> None:
+        cut = len(self._segs)
+        for i in range(len(self._segs) - 1, self._carried, -1):
+            if self._segs[i][2]:
+                if sum(t for _, t, _ in self._segs[:i]) >= self.target_tokens * 3 // 4:
+                    cut = i
+                break
+        self._emit(cut, out)
+
+    def _emit(self, cut: int, out: List[str]) -> None:
+        chunk, rest = self._segs[:cut], self._segs[cut:]
+        text = "".join(s for s, _, _ in chunk).strip()
+        if text:
+            out.append(text)
+
+        overlap, overlap_tokens = [], 0
+        for seg in reversed(chunk):
+            if overlap_tokens + seg[1] > self.overlap_tokens:
+                break
+            overlap.insert(0, seg)
+            overlap_tokens += seg[1]
+
+        self._segs = overlap + rest
+        self._carried = len(overlap)
+        self._tokens = overlap_tokens + sum(t for _, t, _ in rest)
+
+
+def iter_chunks(
+    source: Union[str, Iterable[str]],
+    target_tokens: int = CHUNK_TARGET_TOKENS,
+    overlap_tokens: int = CHUNK_OVERLAP_TOKENS
+) -> Iterator[str]:
+    """
+    Yield chunks from a string or from an iterable of text pieces (e.g. a streamed upload).
+    """
+    stream = ChunkStream(target_tokens, overlap_tokens)
+    pieces = [source] if isinstance(source, str) else source
+    for piece in pieces:
+        yield from stream.feed(piece)
+    yield from stream.close()
+
+
+def smart_chunks(text: str, target_tokens: int = CHUNK_TARGET_TOKENS, overlap_tokens: int = CHUNK_OVERLAP_TOKENS) -> list:
+    with metrics.stage("chunk"):
+        chunks = list(iter_chunks(text, target_tokens, overlap_tokens))
+    CHUNKS_PER_TRANSCRIPT.observe(len(chunks))
     return chunks
@@ -1,23 +1,35 @@
-from dotenv import load_dotenv
-load_dotenv()  # Must be at the top before accessing os.getenv
-
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import os
 import html
+from typing import Dict, Any, List
 from smtplib import SMTPRecipientsRefused, SMTPAuthenticationError, SMTPException
 
-def send_email(subject: str, body: str, recipients: list):
-    # Load SMTP configuration from environment variables
-    smtp_host = os.getenv("SMTP_HOST", "smtp.gmail.com")
-    smtp_port = int(os.getenv("SMTP_PORT", 587))
-    smtp_user = os.getenv("SMTP_USER")
-    smtp_pass = os.getenv("SMTP_PASS")
+import metrics
+from env import load_env
+
+load_env()  # before any os.getenv below
+
+EMAILS = metrics.counter("ai_notes_emails_total", "Email send attempts by result.", ("result",))
 
-    if not smtp_user or not smtp_pass:
+
+def smtp_settings() -> Dict[str, Any]:
+    # Load SMTP configuration from environment variables
+    settings = {
+        "host": os.getenv("SMTP_HOST", "smtp.gmail.com"),
+        "port": int(os.getenv("SMTP_PORT", 587)),
+        "user": os.getenv("SMTP_USER"),
+        "password": os.getenv("SMTP_PASS"),
+        # Set SMTP_STARTTLS=false for local relays/test sinks that do not offer TLS
+        "starttls": os.getenv("SMTP_STARTTLS", "true").lower() != "false",
+    }
+    if not settings["user"] or not settings["password"]:
         raise ValueError("SMTP_USER and SMTP_PASS environment variables must be set.")
+    return settings
 
+
+def build_message(subject: str, body: str, recipients: List[str], sender: str) -> MIMEMultipart:
     # Escape HTML special characters
     escaped_body = html.escape(body)
 
@@ -29,37 +41,62 @@ def send_email(subject: str, body: str, recipients: list):
 
     # Create the email message
     msg = MIMEMultipart("alternative")
-    msg['From'] = smtp_user
+    msg['From'] = sender
     msg['To'] = ", ".join(recipients)
     msg['Subject'] = subject
 
     # Attach both plain text and HTML versions
     msg.attach(MIMEText(body, 'plain'))
     msg.attach(MIMEText(html_body, 'html'))
+    return msg
+
 
+def open_connection(settings: Dict[str, Any], timeout: float = 10) -> smtplib.SMTP:
+    """
+    Connect, upgrade to TLS and log in; the caller owns (and must quit) the connection.
+    """
+    server = smtplib.SMTP(settings["host"], settings["port"], timeout=timeout)
     try:
-        # Connect to SMTP server
-        server = smtplib.SMTP(smtp_host, smtp_port, timeout=10)
-        server.ehlo()
-        server.starttls()
         server.ehlo()
-        server.login(smtp_user, smtp_pass)
-        server.sendmail(smtp_user, recipients, msg.as_string())
-        server.quit()
+        if settings["starttls"]:
+            server.starttls()
+            server.ehlo()
+        server.login(settings["user"], settings["password"])
+    except Exception:
+        server.close()
+        raise
+    return server
+
+
+def send_email(subject: str, body: str, recipients: list):
+    settings = smtp_settings()
+    msg = build_message(subject, body, recipients, settings["user"])
+
+    try:
+        # Connect to SMTP server
+        with metrics.stage("email_send"):
+            server = open_connection(settings)
+            server.sendmail(settings["user"], recipients, msg.as_string())
+            server.quit()
+        EMAILS.inc(result="sent")
         print(f"Email sent successfully to {', '.join(recipients)}")
 
     except SMTPRecipientsRefused as e:
+        EMAILS.inc(result="failed")
         print(f"Error: Recipient refused - {e.recipients}")
         raise ValueError(f"One or more recipient emails are invalid: {e.recipients}") from e
 
     except SMTPAuthenticationError as e:
+        EMAILS.inc(result="failed")
         print("Error: SMTP authentication failed. Check SMTP_USER and SMTP_PASS.")
         raise ValueError("SMTP authentication failed. Check your username and password.") from e
 
     except SMTPException as e:
+        EMAILS.inc(result="failed")
         print(f"SMTP error occurred: {e}")
         raise RuntimeError(f"SMTP error occurred: {e}") from e
 
     except Exception as e:
+        EMAILS.inc(result="failed")
         print(f"Unexpected error sending email: {e}")
         raise RuntimeError(f"Unexpected error sending email: {e}") from e
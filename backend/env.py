@@ -0,0 +1,21 @@
+import threading
+
+from dotenv import load_dotenv
+
+_loaded = False
+_lock = threading.Lock()
+
+
+def load_env() -> None:
+    """
+    Load .env into the environment, once per process. Every module that reads
+    settings at import time calls this first, so whichever is imported first
+    loads the file and the rest return immediately.
+    """
+    global _loaded
+    if _loaded:
+        return
+    with _lock:
+        if not _loaded:
+            load_dotenv()
+            _loaded = True
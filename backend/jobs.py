@@ -0,0 +1,227 @@
+import os
+import uuid
+import socket
+import logging
+import threading
+from collections import deque, Counter
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Any, Optional
+
+from sqlalchemy import or_, select, update
+
+from database import SessionLocal
+from models import SummaryJob
+
+# Global cap: number of summarization jobs running at once
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# Per-user cap: jobs from one user running at once
+JOB_PER_USER_LIMIT = int(os.getenv("JOB_PER_USER_LIMIT", str(JOB_WORKERS)))
+# A running job whose owner has not heartbeated for this long is considered abandoned
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+# How often running jobs are heartbeated and abandoned ones looked for
+JOB_HEARTBEAT_INTERVAL = float(os.getenv("JOB_HEARTBEAT_INTERVAL", "15"))
+
+logger = logging.getLogger(__name__)
+
+# runner(job, report_progress) -> summary_id
+JobRunner = Callable[[Dict[str, Any], Callable[[Dict[str, Any]], None]], str]
+
+
+def job_to_dict(job: SummaryJob) -> Dict[str, Any]:
+    return {
+        "id": job.id,
+        "username": job.username,
+        "transcript_id": job.transcript_id,
+        "instruction": job.instruction,
+        "status": job.status,
+        "progress": job.progress or {},
+        "summary_id": job.summary_id,
+        "error": job.error,
+    }
+
+
+class JobQueue:
+    """
+    In-process summarization queue backed by the `summary_jobs` table.
+
+    Jobs are persisted on submit and every state change. A fixed set of worker
+    threads enforces the global cap; a job is only handed out while its user
+    has fewer than `per_user` jobs running.
+
+    Several processes may share the table. A worker claims a job with one
+    conditional UPDATE (queued -> running, owner = this queue), so each job
+    runs once. Owners heartbeat their running jobs every JOB_HEARTBEAT_INTERVAL;
+    recover() re-queues only jobs whose heartbeat is older than JOB_LEASE_SECONDS,
+    e.g. after a restart or a crash, and never one a live process is running.
+    """
+
+    def __init__(self, runner: JobRunner, workers: int = JOB_WORKERS, per_user: int = JOB_PER_USER_LIMIT):
+        self._runner = runner
+        self._workers = workers
+        self._per_user = per_user
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._pending = deque()  # (job_id, username)
+        self._running = Counter()
+        self._cond = threading.Condition()
+        self._threads = []
+        self._stopping = False
+
+    # -----------------------------
+    # Lifecycle
+    # -----------------------------
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stopping = False
+        self.recover()
+        for i in range(self._workers):
+            t = threading.Thread(target=self._work, name=f"summary-job-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        t = threading.Thread(target=self._heartbeat_loop, name="summary-job-heartbeat", daemon=True)
+        t.start()
+        self._threads.append(t)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+
+    def recover(self) -> None:
+        """
+        Re-queue jobs whose owner stopped heartbeating, then pick up every queued job, oldest first.
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=JOB_LEASE_SECONDS)
+        with SessionLocal() as db:
+            db.execute(
+                update(SummaryJob)
+                .where(
+                    SummaryJob.status == "running",
+                    or_(SummaryJob.heartbeat_at.is_(None), SummaryJob.heartbeat_at < cutoff)
+                )
+                .values(status="queued", owner=None)
+            )
+            db.commit()
+            pending = db.execute(
+                select(SummaryJob.id, SummaryJob.username)
+                .where(SummaryJob.status == "queued")
+                .order_by(SummaryJob.created_at)
+            ).all()
+        with self._cond:
+            queued = {job_id for job_id, _ in self._pending}
+            self._pending.extend((job_id, username) for job_id, username in pending if job_id not in queued)
+            self._cond.notify_all()
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def submit(self, username: str, transcript_id: str, instruction: str) -> str:
+        job_id = str(uuid.uuid4())
+        with SessionLocal() as db:
+            db.add(SummaryJob(
+                id=job_id,
+                username=username,
+                transcript_id=transcript_id,
+                instruction=instruction,
+                status="queued",
+                progress={}
+            ))
+            db.commit()
+        with self._cond:
+            self._pending.append((job_id, username))
+            self._cond.notify()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with SessionLocal() as db:
+            job = db.get(SummaryJob, job_id)
+            return job_to_dict(job) if job else None
+
+    def depth(self) -> Dict[str, int]:
+        with self._cond:
+            return {"queued": len(self._pending), "running": sum(self._running.values())}
+
+    # -----------------------------
+    # Workers
+    # -----------------------------
+    def _claim(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Take a queued job for this queue, or return None if it is gone or another worker or process has it.
+        """
+        with SessionLocal() as db:
+            claimed = db.execute(
+                update(SummaryJob)
+                .where(SummaryJob.id == job_id, SummaryJob.status == "queued")
+                .values(status="running", owner=self.owner, heartbeat_at=datetime.utcnow(), error=None)
+            ).rowcount == 1
+            db.commit()
+            return job_to_dict(db.get(SummaryJob, job_id)) if claimed else None
+
+    def _update(self, job_id: str, **fields) -> bool:
+        """
+        Record fields on a job this queue is running; False once the job is no longer ours.
+        """
+        with SessionLocal() as db:
+            updated = db.execute(
+                update(SummaryJob)
+                .where(SummaryJob.id == job_id, SummaryJob.status == "running", SummaryJob.owner == self.owner)
+                .values(heartbeat_at=datetime.utcnow(), **fields)
+            ).rowcount == 1
+            db.commit()
+            return updated
+
+    def _heartbeat(self) -> None:
+        with SessionLocal() as db:
+            db.execute(
+                update(SummaryJob)
+                .where(SummaryJob.status == "running", SummaryJob.owner == self.owner)
+                .values(heartbeat_at=datetime.utcnow())
+            )
+            db.commit()
+
+    def _heartbeat_loop(self) -> None:
+        while True:
+            with self._cond:
+                if not self._stopping:
+                    self._cond.wait(JOB_HEARTBEAT_INTERVAL)
+                if self._stopping:
+                    return
+            try:
+                self._heartbeat()
+                self.recover()
+            except Exception:
+                logger.exception("Summary job heartbeat failed")
+
+    def _next(self):
+        with self._cond:
+            while not self._stopping:
+                for idx, (job_id, username) in enumerate(self._pending):
+                    if self._running[username] < self._per_user:
+                        del self._pending[idx]
+                        self._running[username] += 1
+                        return job_id, username
+                self._cond.wait()
+            return None
+
+    def _work(self) -> None:
+        while True:
+            item = self._next()
+            if item is None:
+                return
+            job_id, username = item
+            try:
+                job = self._claim(job_id)
+                if job is None:
+                    continue
+                report = lambda progress: self._update(job_id, progress=progress)
+                summary_id = self._runner(job, report)
+                self._update(job_id, status="done", summary_id=summary_id)
+            except Exception as e:
+                self._update(job_id, status="failed", error=str(e))
+            finally:
+                with self._cond:
+                    self._running[username] -= 1
+                    self._cond.notify_all()
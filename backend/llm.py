@@ -1,68 +1,671 @@
 import os
+import re
 import json
-from typing import Dict, Any, List, Tuple
-from dotenv import load_dotenv
-from chunking import smart_chunks
-from prompts import SYSTEM_PROMPT, FUSE_PROMPT
-from groq import Groq  # Correct import
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Any, List, Tuple, Iterable, Iterator, Callable, Optional, Sequence, Union
+from env import load_env
+load_env()  # before the imports below read their settings
+from chunking import smart_chunks, count_tokens
+from cache import cache_key, make_cache
+from prompts import SYSTEM_PROMPT, FUSE_PROMPT, MERGE_PROMPT, UPDATE_PROMPT, REPAIR_PROMPT
+from scheduler import make_scheduler, default_retryable, PRIORITY_FUSE, PRIORITY_MAP, PRIORITY_BATCH
+from structured import (
+    SUMMARY_HEADING, SUMMARY_SCHEMA, section_schema, load_json_object, validate_sections, complete, render_summary
+)
+from metrics import ContextExecutor
+import metrics
 
-# Load environment variables from .env
-load_dotenv()
-
-# Initialize Groq client with API key
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
 MODEL = os.getenv("GROQ_MODEL", "llama-3.1-70b-versatile")
+# Smaller, cheaper model that reshapes fuse output sections that fail validation
+REPAIR_MODEL = os.getenv("GROQ_REPAIR_MODEL", "llama-3.1-8b-instant")
+
+# Completion tokens budgeted per call when charging the tokens-per-minute bucket
+COMPLETION_TOKEN_ESTIMATE = int(os.getenv("GROQ_COMPLETION_TOKEN_ESTIMATE", "512"))
+
+_client = None
+_client_lock = threading.Lock()
+# Groq's connection error type, known once the SDK has been imported by get_client()
+_connection_errors = ()
+
+# Rate-limit-aware gate shared by every model call in the process
+scheduler = make_scheduler(lambda e: isinstance(e, _connection_errors) or default_retryable(e))
+
+# Upper bound on model calls in flight at once, shared by every request
+MAX_CONCURRENCY = int(os.getenv("GROQ_MAX_CONCURRENCY", "4"))
+# Chunks of one transcript queued on the pool at a time; the rest are read as slots free up
+CHUNK_WINDOW = int(os.getenv("GROQ_CHUNK_WINDOW", str(MAX_CONCURRENCY * 2)))
+# Model calls in flight for /summarize/batch, on a pool of their own so a batch never
+# queues ahead of interactive requests
+BATCH_CONCURRENCY = int(os.getenv("GROQ_BATCH_CONCURRENCY", str(max(1, MAX_CONCURRENCY // 2))))
+
+# Largest amount of partial-summary text (in tokens) sent to a single fuse call
+FUSE_TOKEN_BUDGET = int(os.getenv("GROQ_FUSE_TOKEN_BUDGET", "6000"))
+
+_executor = None
+_batch_executor = None
+_executor_lock = threading.Lock()
+
+# Two-level cache: partial (per-chunk and merged) summaries, and fused results
+partial_cache = make_cache("partials")
+fused_cache = make_cache("fused")
+
+# -----------------------------
+# Metrics
+# -----------------------------
+GROQ_TOKENS = metrics.counter("ai_notes_groq_tokens_total", "Tokens reported in Groq usage.", ("type",))
+FUSE_REPAIRS = metrics.counter(
+    "ai_notes_fuse_repairs_total", "Fuse output sections sent through the repair pass.", ("section", "result")
+)
+for _stat in ("calls", "retries", "rate_limited", "coalesced"):
+    metrics.callback(
+        f"ai_notes_groq_{_stat}_total", f"Scheduler {_stat.replace('_', ' ')} count.", "counter",
+        lambda _stat=_stat: scheduler.stats[_stat]
+    )
+for _stat in ("hits", "misses"):
+    metrics.callback(
+        f"ai_notes_cache_{_stat}_total", f"Summary cache {_stat}.", "counter",
+        lambda _stat=_stat: {name: stats[_stat] for name, stats in cache_stats().items()}, ("cache",)
+    )
+metrics.callback(
+    "ai_notes_groq_waiting_calls", "Model calls waiting in the scheduler for their turn or rate budget.", "gauge",
+    lambda: scheduler.depth()
+)
+metrics.callback(
+    "ai_notes_executor_queue_depth", "Tasks queued for a model-call pool thread.", "gauge",
+    lambda: {"interactive": _executor.depth() if _executor else 0, "batch": _batch_executor.depth() if _batch_executor else 0},
+    ("pool",)
+)
+metrics.callback(
+    "ai_notes_cache_entries", "Entries held in memory per summary cache.", "gauge",
+    lambda: {name: stats["size"] for name, stats in cache_stats().items()}, ("cache",)
+)
+
+
+def record_usage(usage: Any) -> None:
+    if usage is not None:
+        GROQ_TOKENS.inc(getattr(usage, "prompt_tokens", 0) or 0, type="prompt")
+        GROQ_TOKENS.inc(getattr(usage, "completion_tokens", 0) or 0, type="completion")
+
+
+def get_client():
+    """
+    Return the Groq client, created on first use. The SDK is imported here rather
+    than at module load, since it is the slowest import on the app's startup path.
+    GROQ_BASE_URL may point the client at a local stand-in; retries are owned by
+    the scheduler, so the SDK's own retry loop is disabled.
+    """
+    global _client, _connection_errors
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from groq import Groq, APIConnectionError
+                _connection_errors = (APIConnectionError,)
+                _client = Groq(api_key=os.getenv("GROQ_API_KEY"), max_retries=0)
+    return _client
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Return the shared worker pool that runs chunk summaries, created on first use.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ContextExecutor(max_workers=MAX_CONCURRENCY, thread_name_prefix="groq")
+    return _executor
+
+
+def get_batch_executor() -> ThreadPoolExecutor:
+    """
+    Return the pool that runs batch summaries, created on first use.
+    """
+    global _batch_executor
+    if _batch_executor is None:
+        with _executor_lock:
+            if _batch_executor is None:
+                _batch_executor = ContextExecutor(max_workers=BATCH_CONCURRENCY, thread_name_prefix="groq-batch")
+    return _batch_executor
+
+
+def estimate_call_tokens(messages: List[Dict[str, str]]) -> int:
+    return sum(count_tokens(m["content"]) for m in messages) + COMPLETION_TOKEN_ESTIMATE
+
+
+def failed_generation(e: Exception) -> Optional[str]:
+    """
+    The rejected output of a JSON-mode call that Groq refused as invalid JSON, if e is that error.
+    """
+    body = getattr(e, "body", None)
+    if isinstance(body, dict):
+        body = body.get("error", body)
+    if isinstance(body, dict) and body.get("code") == "json_validate_failed":
+        return body.get("failed_generation") or ""
+    return None
+
+
+def _create_completion(messages: List[Dict[str, str]], model: Optional[str] = None, json_mode: bool = False) -> str:
+    kwargs = {"response_format": {"type": "json_object"}} if json_mode else {}
+    try:
+        resp = get_client().chat.completions.create(
+            model=model or MODEL,
+            messages=messages,
+            temperature=0.2,
+            **kwargs
+        )
+    except Exception as e:
+        # In JSON mode Groq rejects invalid output with a 400; hand the output on to be repaired
+        output = failed_generation(e) if json_mode else None
+        if output is None:
+            raise
+        return output
+    record_usage(resp.usage)
+    return resp.choices[0].message.content
 
 
-def call_groq(messages: List[Dict[str, str]]) -> str:
+def call_groq(
+    messages: List[Dict[str, str]],
+    priority: int = PRIORITY_MAP,
+    model: Optional[str] = None,
+    json_mode: bool = False
+) -> str:
     """
     Call Groq chat API with a list of messages and return the content of the first choice.
+    Goes through the shared scheduler for rate limiting, retries and coalescing.
+    json_mode asks Groq for a single JSON object (response_format json_object).
     """
-    resp = client.chat.completions.create(
-        model=MODEL,
-        messages=messages,
-        temperature=0.2
+    return scheduler.call(
+        _create_completion, messages, estimate_call_tokens(messages), priority, model=model, json_mode=json_mode
     )
-    return resp.choices[0].message.content
 
 
-def generate_summary(transcript: str, instruction: str) -> Tuple[Dict[str, Any], str]:
+def call_groq_stream(messages: List[Dict[str, str]], priority: int = PRIORITY_FUSE) -> Iterator[str]:
+    """
+    Call Groq chat API in streaming mode and yield content deltas as they arrive.
+    Opening the stream is rate limited and retried; a stream that breaks midway is not.
+    """
+    stream = scheduler.run(
+        lambda: get_client().chat.completions.create(
+            model=MODEL,
+            messages=messages,
+            temperature=0.2,
+            stream=True
+        ),
+        estimate_call_tokens(messages),
+        priority
+    )
+    for event in stream:
+        if event.choices and event.choices[0].delta.content:
+            yield event.choices[0].delta.content
+        # Groq reports usage on the final chunk, under x_groq
+        x_groq = getattr(event, "x_groq", None)
+        record_usage(getattr(event, "usage", None) or getattr(x_groq, "usage", None))
+
+
+def summarize_chunk(chunk: str, index: int, total: int, instruction: str, priority: int = PRIORITY_MAP) -> str:
+    """
+    Produce the partial summary for a single transcript chunk.
+    Cached by content, so unchanged chunks of an edited transcript are free.
+    """
+    key = cache_key(chunk, instruction, MODEL, SYSTEM_PROMPT)
+    partial = partial_cache.get(key)
+    if partial is None:
+        with metrics.stage("map"):
+            partial = call_groq([
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": f"Custom instruction:\n{instruction}\n\nTranscript part {index+1} of {total}:\n{chunk}"}
+            ], priority=priority)
+        partial_cache.set(key, partial)
+    return partial
+
+
+def iter_partials(
+    chunks: Iterable[str],
+    instruction: str,
+    start: int = 0,
+    total: Optional[int] = None,
+    executor: Optional[ThreadPoolExecutor] = None,
+    priority: int = PRIORITY_MAP
+) -> Iterator[Tuple[int, str]]:
+    """
+    Summarize chunks on the shared pool (or `executor`) and yield (index, partial) in completion order.
+
+    Chunks are pulled from the iterable only as pool slots free up (at most
+    CHUNK_WINDOW ahead), so a lazily loaded transcript is never held in memory
+    whole. start/total place the chunks within a longer transcript.
+    """
+    executor = executor or get_executor()
+    total = total or start + len(chunks)
+    pending = {}
+    source = enumerate(chunks, start)
+    exhausted = False
+    while True:
+        while not exhausted and len(pending) < CHUNK_WINDOW:
+            item = next(source, None)
+            if item is None:
+                exhausted = True
+                break
+            index, chunk = item
+            pending[executor.submit(summarize_chunk, chunk, index, total, instruction, priority)] = index
+        if not pending:
+            return
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for fut in done:
+            yield pending.pop(fut), fut.result()
+
+
+def summarize_chunks(
+    chunks: Iterable[str],
+    instruction: str,
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    start: int = 0,
+    total: Optional[int] = None
+) -> List[str]:
+    """
+    Summarize all chunks concurrently on the shared pool.
+    Partials are returned in chunk order so the fuse prompt stays deterministic.
+    on_progress, if given, receives a progress dict each time a chunk completes.
+    start/total place the chunks within a longer transcript when only its tail is summarized.
+    """
+    partials = {}
+    for index, partial in iter_partials(chunks, instruction, start, total):
+        partials[index] = partial
+        if on_progress:
+            on_progress({"stage": "map", "completed": len(partials), "total": len(chunks)})
+    return [partials[i] for i in sorted(partials)]
+
+
+def group_partials(partials: List[str], budget: int) -> List[List[str]]:
+    """
+    Pack consecutive partials into groups whose estimated size stays within budget.
+    """
+    groups, cur, cur_len = [], [], 0
+    for p in partials:
+        l = count_tokens(p)
+        if cur and cur_len + l > budget:
+            groups.append(cur)
+            cur, cur_len = [], 0
+        cur.append(p)
+        cur_len += l
+    if cur:
+        groups.append(cur)
+    # Every partial is over budget on its own: pair them up so each level still shrinks
+    if len(groups) == len(partials) and len(partials) > 1:
+        groups = [partials[i:i + 2] for i in range(0, len(partials), 2)]
+    return groups
+
+
+def merge_partials(group: List[str], instruction: str, priority: int = PRIORITY_FUSE) -> str:
+    """
+    Merge a group of partial summaries into one intermediate partial summary.
+    """
+    key = cache_key(*group, instruction, MODEL, MERGE_PROMPT)
+    merged = partial_cache.get(key)
+    if merged is None:
+        with metrics.stage("merge"):
+            merged = call_groq([
+                {"role": "system", "content": MERGE_PROMPT},
+                {"role": "user", "content": f"Custom instruction:\n{instruction}\n\nPartials:\n" + "\n\n".join(group)}
+            ], priority=priority)
+        partial_cache.set(key, merged)
+    return merged
+
+
+def reduce_partials(
+    partials: List[str],
+    instruction: str,
+    budget: int = FUSE_TOKEN_BUDGET,
+    executor: Optional[ThreadPoolExecutor] = None,
+    priority: int = PRIORITY_FUSE
+) -> List[str]:
+    """
+    Merge partials level by level, each level in parallel, until they fit one fuse call.
+    """
+    executor = executor or get_executor()
+    while len(partials) > 1 and sum(count_tokens(p) for p in partials) > budget:
+        groups = group_partials(partials, budget)
+        futures = [executor.submit(merge_partials, g, instruction, priority) for g in groups]
+        partials = [f.result() for f in futures]
+    return partials
+
+
+def fuse_messages(partials: List[str], instruction: str, previous: Optional[Dict[str, Any]] = None) -> List[Dict[str, str]]:
+    """
+    Messages for the fuse call. With a previous summary, ask the model to update it
+    with the new partials instead of fusing the whole transcript again. Only the
+    structured sections go back and forth; the editable text is rendered locally.
+    """
+    if previous is not None:
+        return [
+            {"role": "system", "content": f"{UPDATE_PROMPT}\n\nJSON schema:\n{SUMMARY_SCHEMA}"},
+            {"role": "user", "content": f"Custom instruction:\n{instruction}\n\nCurrent summary:\n{json.dumps(previous['structured'])}\n\nNew partials:\n" + "\n\n".join(partials)}
+        ]
+    return [
+        {"role": "system", "content": f"{FUSE_PROMPT}\n\nJSON schema:\n{SUMMARY_SCHEMA}"},
+        {"role": "user", "content": f"Custom instruction:\n{instruction}\n\nPartials:\n" + "\n\n".join(partials)}
+    ]
+
+
+def fuse_key(partials: List[str], instruction: str, previous: Optional[Dict[str, Any]] = None) -> str:
+    if previous is not None:
+        return cache_key(json.dumps(previous["structured"], sort_keys=True), *partials, instruction, MODEL, UPDATE_PROMPT, SUMMARY_SCHEMA)
+    return cache_key(*partials, instruction, MODEL, FUSE_PROMPT, SUMMARY_SCHEMA)
+
+
+def fuse_partials(
+    partials: List[str],
+    instruction: str,
+    previous: Optional[Dict[str, Any]] = None,
+    priority: int = PRIORITY_FUSE
+) -> Dict[str, Any]:
+    """
+    Fuse the final set of partials (into the previous summary, if given) into a
+    validated structured summary. The validated result is what gets cached, so a
+    repaired reply is never repaired twice.
+    """
+    key = fuse_key(partials, instruction, previous)
+    cached = fused_cache.get(key)
+    if cached is not None:
+        return json.loads(cached)
+    with metrics.stage("fuse"):
+        fused_output = call_groq(fuse_messages(partials, instruction, previous), priority=priority, json_mode=True)
+    structured = parse_fused_output(fused_output)
+    fused_cache.set(key, json.dumps(structured))
+    return structured
+
+
+def repair_section(name: str, value: Any) -> Optional[Dict[str, Any]]:
+    """
+    Have REPAIR_MODEL reshape one section that failed validation (or, for "summary",
+    a whole reply that was not JSON). Only that section is sent, not the partials.
+    Returns {name: value} as the model returned it, or None if the call failed.
+    """
+    raw = value if isinstance(value, str) else json.dumps(value)
+    try:
+        with metrics.stage("repair"):
+            output = call_groq([
+                {"role": "system", "content": REPAIR_PROMPT},
+                {"role": "user", "content": f"Section: {name}\n\nJSON schema:\n{section_schema(name)}\n\nCurrent value:\n{raw}"}
+            ], priority=PRIORITY_FUSE, model=REPAIR_MODEL, json_mode=True)
+    except Exception:
+        return None
+    return load_json_object(output)
+
+
+def parse_fused_output(fused_output: str) -> Dict[str, Any]:
+    """
+    Validate the fuse reply section by section. A section that fails is sent on
+    its own through repair_section(); whatever still fails is left empty, so one
+    malformed section never costs the rest of the summary or a re-run of the
+    pipeline. A reply that cannot be repaired into JSON at all is kept as the overview.
+    """
+    with metrics.stage("parse"):
+        data = load_json_object(fused_output)
+        sections, broken = validate_sections(data) if data is not None else ({}, {})
+    if data is None:
+        repaired = repair_section("summary", fused_output)
+        data = repaired.get("summary") if repaired else None
+        FUSE_REPAIRS.inc(section="summary", result="repaired" if isinstance(data, dict) else "failed")
+        if not isinstance(data, dict):
+            return complete({"overview": fused_output.strip()})
+        sections, broken = validate_sections(data)
+
+    for name, value in broken.items():
+        repaired = repair_section(name, value)
+        fixed, _ = validate_sections({name: repaired.get(name)} if repaired else {})
+        FUSE_REPAIRS.inc(section=name, result="repaired" if name in fixed else "failed")
+        sections.update(fixed)
+    return complete(sections)
+
+
+def checkpoint_key(instruction: str) -> str:
+    """
+    Identifies the summaries a checkpoint can be resumed from: same instruction, model, prompts and schema.
+    """
+    return cache_key(instruction, MODEL, SYSTEM_PROMPT, FUSE_PROMPT, UPDATE_PROMPT, SUMMARY_SCHEMA)
+
+
+def resume_point(chunks: List[str], checkpoint: Optional[Dict[str, Any]]) -> Tuple[Optional[Dict[str, Any]], int]:
+    """
+    (previous summary, index of the first chunk it does not cover) for a checkpoint
+    {"chunk_count", "structured", "editable_text"}, or (None, 0) when it cannot be used.
+    """
+    if not checkpoint or not 0 < checkpoint["chunk_count"] <= len(chunks):
+        return None, 0
+    previous = {"structured": checkpoint["structured"] or {}, "editable_text": checkpoint["editable_text"] or ""}
+    return previous, checkpoint["chunk_count"]
+
+
+def as_chunks(transcript: Union[str, Sequence[str]]) -> Sequence[str]:
+    """
+    Chunks of a raw transcript, or stored chunks (a list or a lazy view) as given.
+    """
+    return smart_chunks(transcript) if isinstance(transcript, str) else transcript
+
+
+def cache_stats() -> Dict[str, Dict[str, int]]:
+    """
+    Hit/miss counters for both summary cache levels.
+    """
+    return {"partials": partial_cache.stats(), "fused": fused_cache.stats()}
+
+
+def generate_summary(
+    transcript: Union[str, Sequence[str]],
+    instruction: str,
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    checkpoint: Optional[Dict[str, Any]] = None
+) -> Tuple[Dict[str, Any], str]:
     """
     Generate a structured summary and an editable prose version of a transcript.
 
     Steps:
-    1. Split transcript into smart chunks.
-    2. Generate partial summaries for each chunk.
-    3. Fuse partial summaries into a single structured JSON and editable text.
+    1. Split transcript into smart chunks (or take its stored chunks as given).
+    2. Generate partial summaries for each chunk in parallel (bounded by GROQ_MAX_CONCURRENCY).
+    3. Merge partials in budget-sized groups, level by level, while they overflow one fuse call.
+    4. Fuse the remaining partials into a single structured summary (Groq JSON mode),
+       validated per section, repairing only the sections that fail.
+    5. Render the editable text from the structured summary locally.
+
+    With a checkpoint (an earlier result covering the first chunk_count chunks), only
+    the chunks after it are summarized and fused into the earlier result, so a
+    refreshed summary of a growing transcript costs one map call per new chunk plus
+    one fuse call.
 
     Returns:
         structured: dict with sections like agenda, decisions, action_items, etc.
-        editable_text: str, full editable prose version.
-    """
-    chunks = smart_chunks(transcript)
-    partials = []
-
-    # Generate partial summaries for each chunk
-    for i, ch in enumerate(chunks):
-        partial = call_groq([
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": f"Custom instruction:\n{instruction}\n\nTranscript part {i+1} of {len(chunks)}:\n{ch}"}
-        ])
-        partials.append(partial)
-
-    # Fuse partial summaries into structured JSON + editable text
-    fused_output = call_groq([
-        {"role": "system", "content": FUSE_PROMPT},
-        {"role": "user", "content": f"Custom instruction:\n{instruction}\n\nCombine partial summaries into structured JSON with sections: agenda, decisions, action_items, owners, deadlines, risks, open_questions and also produce a clean editable prose version.\n\nPartials:\n" + "\n\n".join(partials)}
-    ])
-
-    # Light validation with fallback
-    try:
-        data = json.loads(fused_output)
-        structured = data.get("structured", {"sections": [], "action_items": []})
-        editable_text = data.get("editable_text", fused_output)
-    except Exception:
-        structured = {"sections": [], "action_items": []}
-        editable_text = fused_output
+        editable_text: str, markdown rendered from structured.
+    """
+    with metrics.stage("summarize"):
+        chunks = as_chunks(transcript)
+        previous, start = resume_point(chunks, checkpoint)
+        if previous is not None and start == len(chunks):
+            return previous["structured"], previous["editable_text"]
+
+        # Generate partial summaries for each chunk
+        partials = summarize_chunks(chunks[start:], instruction, on_progress, start, len(chunks))
+
+        # Tree-reduce partials that would overflow a single fuse prompt
+        partials = reduce_partials(partials, instruction)
+        if on_progress:
+            on_progress({"stage": "fuse", "partials": len(partials)})
+
+        # Fuse partial summaries into a validated structured summary
+        structured = fuse_partials(partials, instruction, previous)
+        return structured, render_summary(structured)
+
+
+def generate_summaries(
+    items: List[Tuple[Union[str, Sequence[str]], str, Optional[Dict[str, Any]]]]
+) -> List[Union[Tuple[Dict[str, Any], str], Exception]]:
+    """
+    Summarize many (transcript or chunks, instruction, checkpoint) items as one workload.
+    As in generate_summary, an item with a checkpoint only summarizes the chunks after it.
+
+    The batch runs on its own pool of BATCH_CONCURRENCY model calls, at the
+    scheduler's lowest priority, so it never queues ahead of interactive
+    requests. Each transcript is fed through iter_partials(), which reads at
+    most CHUNK_WINDOW chunks ahead, and only a few transcripts are in progress
+    at a time. Returns, per item, either (structured, editable_text) or the
+    exception that item raised.
+    """
+    executor = get_batch_executor()
+
+    def finish(idx: int) -> Tuple[Dict[str, Any], str]:
+        transcript, instruction, checkpoint = items[idx]
+        with metrics.stage("summarize"):
+            chunks = as_chunks(transcript)
+            previous, start = resume_point(chunks, checkpoint)
+            if previous is not None and start == len(chunks):
+                return previous["structured"], previous["editable_text"]
+            partials = dict(iter_partials(
+                chunks[start:], instruction, start, len(chunks), executor=executor, priority=PRIORITY_BATCH
+            ))
+            partials = reduce_partials([partials[i] for i in sorted(partials)], instruction, executor=executor, priority=PRIORITY_BATCH)
+            structured = executor.submit(fuse_partials, partials, instruction, previous, PRIORITY_BATCH).result()
+            return structured, render_summary(structured)
+
+    results = []
+    # Coordinators only wait on the batch pool, they never call the model themselves;
+    # two per pool slot keep it busy while some of them wait on a fuse
+    workers = max(1, min(BATCH_CONCURRENCY * 2, len(items)))
+    with ContextExecutor(max_workers=workers, thread_name_prefix="batch") as coordinators:
+        futures = [coordinators.submit(finish, i) for i in range(len(items))]
+        for fut in futures:
+            try:
+                results.append(fut.result())
+            except Exception as e:
+                results.append(e)
+    return results
+
+
+class JsonStringExtractor:
+    """
+    Incrementally pulls the decoded value of one string field out of a streamed JSON object.
+
+    feed() takes raw model deltas and returns whatever new characters of the field
+    became available; escapes split across deltas are held back until complete.
+    """
+
+    _ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+    def __init__(self, key: str):
+        self._key = re.compile(r'"' + re.escape(key) + r'"\s*:\s*"')
+        self._buf = ""
+        self._pos = None  # index of the next undecoded value character
+        self._done = False
+
+    def feed(self, delta: str) -> str:
+        self._buf += delta
+        if self._done:
+            return ""
+        if self._pos is None:
+            m = self._key.search(self._buf)
+            if not m:
+                return ""
+            self._pos = m.end()
+
+        out, i, buf = [], self._pos, self._buf
+        while i < len(buf):
+            c = buf[i]
+            if c == '"':
+                self._done = True
+                i += 1
+                break
+            if c != "\\":
+                out.append(c)
+                i += 1
+                continue
+            if i + 1 >= len(buf):
+                break
+            esc = buf[i + 1]
+            if esc == "u":
+                if i + 6 > len(buf):
+                    break
+                try:
+                    out.append(chr(int(buf[i + 2:i + 6], 16)))
+                except ValueError:
+                    pass
+                i += 6
+            else:
+                out.append(self._ESCAPES.get(esc, esc))
+                i += 2
+        self._pos = i
+        return "".join(out)
+
+
+def stream_summary(
+    transcript: Union[str, Sequence[str]],
+    instruction: str,
+    checkpoint: Optional[Dict[str, Any]] = None
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Same pipeline as generate_summary, but yields (event, data) pairs as it goes:
+
+    - ("progress", ...) each time a chunk partial completes, and when fusion starts
+    - ("token", {"text": ...}) editable_text as it becomes available: the heading, the
+      overview as the fuse call streams it, then the rest once the sections are validated
+    - ("done", {"structured": ..., "editable_text": ...}) once the output is parsed
+
+    Groq's JSON mode does not stream, so the streamed fuse call relies on the prompt
+    and on parse_fused_output() to repair whatever does not validate.
+    """
+    started = time.perf_counter()
+    for event, data in _stream_summary(transcript, instruction, checkpoint):
+        if event == "done":
+            metrics.observe_stage("summarize", time.perf_counter() - started)
+        yield event, data
+
+
+def _stream_summary(
+    transcript: Union[str, Sequence[str]],
+    instruction: str,
+    checkpoint: Optional[Dict[str, Any]]
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    chunks = as_chunks(transcript)
+    previous, start = resume_point(chunks, checkpoint)
+    if previous is not None and start == len(chunks):
+        yield "token", {"text": previous["editable_text"]}
+        yield "done", previous
+        return
+
+    partials = {}
+    for index, partial in iter_partials(chunks[start:], instruction, start, len(chunks)):
+        partials[index] = partial
+        yield "progress", {"stage": "map", "chunk": index + 1, "completed": len(partials), "total": len(chunks) - start}
+
+    partials = [partials[i] for i in sorted(partials)]
+    partials = reduce_partials(partials, instruction)
+    yield "progress", {"stage": "fuse", "partials": len(partials)}
+
+    key = fuse_key(partials, instruction, previous)
+    cached = fused_cache.get(key)
+    if cached is not None:
+        structured = json.loads(cached)
+        editable_text = render_summary(structured)
+        yield "token", {"text": editable_text}
+        yield "done", {"structured": structured, "editable_text": editable_text}
+        return
+
+    extractor = JsonStringExtractor("overview")
+    streamed = SUMMARY_HEADING
+    yield "token", {"text": streamed}
+    pieces = []
+    fuse_started = time.perf_counter()
+    for delta in call_groq_stream(fuse_messages(partials, instruction, previous)):
+        pieces.append(delta)
+        text = extractor.feed(delta)
+        if text:
+            streamed += text
+            yield "token", {"text": text}
+    metrics.observe_stage("fuse", time.perf_counter() - fuse_started)
 
-    return structured, editable_text
+    structured = parse_fused_output("".join(pieces))
+    fused_cache.set(key, json.dumps(structured))
+    editable_text = render_summary(structured)
+    # If the overview changed in validation, the tokens sent so far no longer match; "done" carries the final text
+    if editable_text.startswith(streamed):
+        yield "token", {"text": editable_text[len(streamed):]}
+    yield "done", {"structured": structured, "editable_text": editable_text}
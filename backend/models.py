@@ -1,8 +1,8 @@
 from pydantic import BaseModel, EmailStr
-from typing import List, Dict, Any
-from sqlalchemy import Column, String, Text, ForeignKey
-from sqlalchemy.dialects.sqlite import JSON
-from sqlalchemy.orm import declarative_base, relationship
+from typing import List, Dict, Any, Optional
+from datetime import date, datetime
+from sqlalchemy import Column, String, Text, ForeignKey, Date, DateTime, JSON, Integer, LargeBinary, Index
+from sqlalchemy.orm import declarative_base, relationship, deferred
 
 Base = declarative_base()
 
@@ -12,37 +12,208 @@ Base = declarative_base()
 class Transcript(Base):
     __tablename__ = "transcripts"
     id = Column(String, primary_key=True, index=True)
-    text = Column(Text, nullable=False)
+    # Deferred: the transcript body is only loaded when explicitly accessed.
+    # Only set for transcripts stored before chunks were; since then the text
+    # only exists as stored chunks and the body is empty.
+    text = deferred(Column(Text, nullable=False))
     summaries = relationship("Summary", back_populates="transcript")
 
 
+class TranscriptChunk(Base):
+    __tablename__ = "transcript_chunks"
+    # Chunk boundaries are fixed once stored, so appends only ever add chunks at the end
+    transcript_id = Column(String, ForeignKey("transcripts.id"), primary_key=True)
+    seq = Column(Integer, primary_key=True)
+    codec = Column(String, nullable=False)  # zstd | gzip | none
+    data = Column(LargeBinary, nullable=False)
+
+
 class Summary(Base):
     __tablename__ = "summaries"
     id = Column(String, primary_key=True, index=True)
-    transcript_id = Column(String, ForeignKey("transcripts.id"))
+    transcript_id = Column(String, ForeignKey("transcripts.id"), index=True)
     structured = Column(JSON)
     editable_text = Column(Text)
     generated_text = Column(Text)
     transcript = relationship("Transcript", back_populates="summaries")
 
+
+class SummaryCheckpoint(Base):
+    __tablename__ = "summary_checkpoints"
+    # Latest generated summary per transcript and instruction, covering its first chunk_count chunks
+    transcript_id = Column(String, ForeignKey("transcripts.id"), primary_key=True)
+    instruction_key = Column(String, primary_key=True)
+    chunk_count = Column(Integer, nullable=False)
+    structured = Column(JSON)
+    editable_text = Column(Text)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class IndexedSummary(Base):
+    __tablename__ = "indexed_summaries"
+    # One row per summary in the search index; id is the summary's rowid in the summary_fts table
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    summary_id = Column(String, ForeignKey("summaries.id"), nullable=False, unique=True)
+
+
+class Owner(Base):
+    __tablename__ = "owners"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(String, nullable=False)
+    # Case- and whitespace-insensitive form of the name, used for lookups
+    name_key = Column(String, nullable=False, unique=True)
+
+
+class ActionItem(Base):
+    __tablename__ = "action_items"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    summary_id = Column(String, ForeignKey("summaries.id"), nullable=False, index=True)
+    transcript_id = Column(String, nullable=False)
+    position = Column(Integer, nullable=False)
+    task = Column(Text, nullable=False)
+    owner_id = Column(Integer, ForeignKey("owners.id"))
+    due_date = Column(Date, index=True)
+    due_text = Column(String)  # the deadline as written, e.g. "next sprint"
+    status = Column(String, nullable=False, default="open")  # open | done
+    # "Open items for X due this week" is one range scan; without an owner, due_date's own index
+    # gives the order and status is filtered on the way (most items share one of two statuses).
+    # A transcript's items are read in due-date order from their own index.
+    __table_args__ = (
+        Index("ix_action_items_owner_status_due", "owner_id", "status", "due_date"),
+        Index("ix_action_items_transcript_due", "transcript_id", "due_date"),
+    )
+
+
+class Deadline(Base):
+    __tablename__ = "deadlines"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    summary_id = Column(String, ForeignKey("summaries.id"), nullable=False, index=True)
+    description = Column(Text, nullable=False)
+    due_date = Column(Date, index=True)
+    due_text = Column(String)
+
+
+class SummaryJob(Base):
+    __tablename__ = "summary_jobs"
+    id = Column(String, primary_key=True, index=True)
+    username = Column(String, index=True, nullable=False)
+    transcript_id = Column(String, nullable=False)
+    instruction = Column(Text, nullable=False)
+    status = Column(String, index=True, nullable=False, default="queued")  # queued | running | done | failed
+    # Queue instance running the job, and when it last confirmed it is still alive
+    owner = Column(String)
+    heartbeat_at = Column(DateTime)
+    progress = Column(JSON)
+    summary_id = Column(String)
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class EmailDelivery(Base):
+    __tablename__ = "email_deliveries"
+    id = Column(String, primary_key=True, index=True)
+    summary_id = Column(String, index=True, nullable=False)
+    recipients = Column(JSON, nullable=False)
+    subject = Column(Text, nullable=False)
+    body = Column(Text, nullable=False)
+    status = Column(String, index=True, nullable=False, default="queued")  # queued | sending | sent | failed
+    attempts = Column(Integer, nullable=False, default=0)
+    # Earliest time the row may be claimed: unset for new rows, the backoff after a transient
+    # failure, and while sending, when the sender's claim runs out (e.g. the process died)
+    available_at = Column(DateTime)
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 # -----------------------------
 # Pydantic Models for API
 # -----------------------------
 class UploadRequest(BaseModel):
     transcript_text: str
 
+class AppendRequest(BaseModel):
+    transcript_id: str
+    transcript_text: str
+
+class BatchUploadRequest(BaseModel):
+    transcripts: List[str]
+
 class SummarizeRequest(BaseModel):
     transcript_id: str
     instruction: str
 
+class BatchSummarizeRequest(BaseModel):
+    items: List[SummarizeRequest]
+
+class BatchSummaryResult(BaseModel):
+    transcript_id: str
+    summary_id: Optional[str] = None
+    summary_text: Optional[str] = None
+    structured: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+class BatchSummarizeResponse(BaseModel):
+    results: List[BatchSummaryResult]
+
 class SaveEditRequest(BaseModel):
     summary_id: str
     edited_text: str
+    # Optionally replace the structured summary too (re-indexes its action items and deadlines)
+    structured: Optional[Dict[str, Any]] = None
 
 class ShareRequest(BaseModel):
     summary_id: str
     recipients: List[EmailStr]
 
+class JobSubmitResponse(BaseModel):
+    job_id: str
+    status: str
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    status: str
+    transcript_id: str
+    progress: Dict[str, Any] = {}
+    summary_id: Optional[str] = None
+    summary_text: Optional[str] = None
+    structured: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+class SummarySearchHit(BaseModel):
+    summary_id: str
+    transcript_id: Optional[str] = None
+    snippet: str
+
+class ActionItemResult(BaseModel):
+    summary_id: str
+    transcript_id: str
+    task: str
+    owner: Optional[str] = None
+    due_date: Optional[date] = None
+    due_text: Optional[str] = None
+    status: str
+
+class DeadlineResult(BaseModel):
+    summary_id: str
+    description: str
+    due_date: Optional[date] = None
+    due_text: Optional[str] = None
+
+class SearchPage(BaseModel):
+    limit: int
+    offset: int
+    has_more: bool
+
+class SummarySearchResponse(SearchPage):
+    results: List[SummarySearchHit]
+
+class ActionItemSearchResponse(SearchPage):
+    results: List[ActionItemResult]
+
+class DeadlineSearchResponse(SearchPage):
+    results: List[DeadlineResult]
+
 class SummaryResponse(BaseModel):
     summary_id: str
     summary_text: str
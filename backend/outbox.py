@@ -0,0 +1,359 @@
+import os
+import time
+import uuid
+import heapq
+import random
+import logging
+import smtplib
+import itertools
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import or_, select, update
+
+from database import SessionLocal
+from models import EmailDelivery
+from emailer import smtp_settings, build_message, open_connection, EMAILS
+import metrics
+
+# Background sender threads, and idle authenticated connections kept for reuse
+OUTBOX_WORKERS = int(os.getenv("OUTBOX_WORKERS", "2"))
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", str(OUTBOX_WORKERS)))
+# Connections idle longer than this are closed rather than reused
+SMTP_IDLE_TIMEOUT = float(os.getenv("SMTP_IDLE_TIMEOUT", "120"))
+# Recipients per message; larger lists are split into several deliveries
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+OUTBOX_RETRY_BASE_DELAY = float(os.getenv("OUTBOX_RETRY_BASE_DELAY", "2"))
+# How long a claimed delivery stays with its sender before another process may take it over
+OUTBOX_LEASE_SECONDS = float(os.getenv("OUTBOX_LEASE_SECONDS", "300"))
+# How often each process looks for deliveries it did not queue itself (retries, abandoned claims)
+OUTBOX_SWEEP_INTERVAL = float(os.getenv("OUTBOX_SWEEP_INTERVAL", "60"))
+
+logger = logging.getLogger(__name__)
+
+
+def delivery_to_dict(delivery: EmailDelivery) -> Dict[str, Any]:
+    return {
+        "id": delivery.id,
+        "summary_id": delivery.summary_id,
+        "recipients": delivery.recipients,
+        "status": delivery.status,
+        "attempts": delivery.attempts,
+        "error": delivery.error,
+        "created_at": delivery.created_at.isoformat() if delivery.created_at else None,
+        "updated_at": delivery.updated_at.isoformat() if delivery.updated_at else None,
+    }
+
+
+def is_transient(exc: Exception) -> bool:
+    """
+    Worth retrying: dropped connections, network errors and 4xx SMTP replies.
+    """
+    if isinstance(exc, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)):
+        return True
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return 400 <= exc.smtp_code < 500
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in exc.recipients.values())
+    if isinstance(exc, smtplib.SMTPException):
+        return False
+    # Socket errors and timeouts (SMTPException is itself an OSError, hence the order)
+    return isinstance(exc, OSError)
+
+
+class SMTPPool:
+    """
+    Pool of logged-in SMTP connections, so each message skips the connect/STARTTLS/AUTH handshake.
+    """
+
+    def __init__(self, size: int = SMTP_POOL_SIZE, idle_timeout: float = SMTP_IDLE_TIMEOUT):
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self._idle = []  # (released_at, connection)
+        self._lock = threading.Lock()
+
+    def acquire(self, settings: Dict[str, Any]) -> smtplib.SMTP:
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                released_at, conn = self._idle.pop()
+            idle = time.monotonic() - released_at
+            if idle > self.idle_timeout:
+                self._close(conn)
+                continue
+            # Cheap liveness check only for connections that sat around for a while
+            if idle > 10:
+                try:
+                    if conn.noop()[0] != 250:
+                        raise smtplib.SMTPServerDisconnected("NOOP failed")
+                except Exception:
+                    self._close(conn)
+                    continue
+            return conn
+        return open_connection(settings)
+
+    def release(self, conn: smtplib.SMTP, broken: bool = False) -> None:
+        if not broken:
+            with self._lock:
+                if len(self._idle) < self.size:
+                    self._idle.append((time.monotonic(), conn))
+                    return
+        self._close(conn)
+
+    def close_all(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for _, conn in idle:
+            self._close(conn)
+
+    @staticmethod
+    def _close(conn: smtplib.SMTP) -> None:
+        try:
+            conn.quit()
+        except Exception:
+            conn.close()
+
+
+class EmailOutbox:
+    """
+    Persistent, asynchronous email queue for shared summaries.
+
+    enqueue() validates the SMTP configuration, splits the recipient list into
+    batches of OUTBOX_BATCH_SIZE, records one `email_deliveries` row per batch
+    and returns at once. Background workers send through an SMTPPool, retry
+    transient failures with jittered exponential backoff and record the final
+    status on each row.
+
+    Several processes may share the table. A worker claims a row with one
+    conditional UPDATE before sending it, so each attempt is made by exactly
+    one process; the claim lapses after OUTBOX_LEASE_SECONDS, and a periodic
+    sweep picks up rows whose sender died, as well as unsent rows on start().
+    """
+
+    def __init__(
+        self,
+        workers: int = OUTBOX_WORKERS,
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+        pool: Optional[SMTPPool] = None
+    ):
+        self._workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.pool = pool or SMTPPool()
+        self._ready = []  # heap of (not_before, seq, delivery_id)
+        self._scheduled = set()  # delivery ids in _ready
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._threads = []
+        self._stopping = False
+
+    # -----------------------------
+    # Lifecycle
+    # -----------------------------
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stopping = False
+        self.sweep()
+        for i in range(self._workers):
+            t = threading.Thread(target=self._work, name=f"outbox-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        t = threading.Thread(target=self._sweep_loop, name="outbox-sweep", daemon=True)
+        t.start()
+        self._threads.append(t)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+        self.pool.close_all()
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def enqueue(self, summary_id: str, subject: str, body: str, recipients: List[str]) -> List[str]:
+        smtp_settings()  # fail fast (ValueError) when SMTP is not configured
+        rows = [
+            EmailDelivery(
+                id=str(uuid.uuid4()),
+                summary_id=summary_id,
+                recipients=recipients[i:i + self.batch_size],
+                subject=subject,
+                body=body,
+                status="queued",
+                attempts=0
+            )
+            for i in range(0, len(recipients), self.batch_size)
+        ]
+        with SessionLocal() as db:
+            db.add_all(rows)
+            db.commit()
+        for row in rows:
+            self._schedule(row.id, 0)
+        return [row.id for row in rows]
+
+    def status(self, summary_id: str) -> List[Dict[str, Any]]:
+        with SessionLocal() as db:
+            rows = (
+                db.query(EmailDelivery)
+                .filter(EmailDelivery.summary_id == summary_id)
+                .order_by(EmailDelivery.created_at)
+                .all()
+            )
+            return [delivery_to_dict(row) for row in rows]
+
+    def depth(self) -> int:
+        with self._cond:
+            return len(self._ready)
+
+    def sweep(self) -> None:
+        """
+        Schedule every delivery that can be claimed now: unsent rows, retries that
+        are due, and rows whose sender's claim ran out. An abandoned row that
+        already used all its attempts is marked failed instead.
+        """
+        now = datetime.utcnow()
+        claimable = or_(EmailDelivery.available_at.is_(None), EmailDelivery.available_at <= now)
+        with SessionLocal() as db:
+            db.execute(
+                update(EmailDelivery)
+                .where(
+                    EmailDelivery.status == "sending",
+                    EmailDelivery.available_at <= now,
+                    EmailDelivery.attempts >= self.max_attempts
+                )
+                .values(status="failed", error="Sender stopped before the last attempt finished")
+            )
+            db.commit()
+            pending = db.scalars(
+                select(EmailDelivery.id)
+                .where(EmailDelivery.status.in_(("queued", "sending")), claimable)
+                .order_by(EmailDelivery.created_at)
+            ).all()
+        for delivery_id in pending:
+            self._schedule(delivery_id, 0)
+
+    # -----------------------------
+    # Workers
+    # -----------------------------
+    def _schedule(self, delivery_id: str, delay: float) -> None:
+        with self._cond:
+            if delivery_id in self._scheduled:
+                return
+            self._scheduled.add(delivery_id)
+            heapq.heappush(self._ready, (time.monotonic() + delay, next(self._seq), delivery_id))
+            self._cond.notify()
+
+    def _next(self) -> Optional[str]:
+        with self._cond:
+            while not self._stopping:
+                if self._ready:
+                    wait = self._ready[0][0] - time.monotonic()
+                    if wait <= 0:
+                        delivery_id = heapq.heappop(self._ready)[2]
+                        self._scheduled.discard(delivery_id)
+                        return delivery_id
+                    self._cond.wait(wait)
+                else:
+                    self._cond.wait()
+            return None
+
+    def _sweep_loop(self) -> None:
+        while True:
+            with self._cond:
+                if not self._stopping:
+                    self._cond.wait(OUTBOX_SWEEP_INTERVAL)
+                if self._stopping:
+                    return
+            try:
+                self.sweep()
+            except Exception:
+                logger.exception("Outbox sweep failed")
+
+    def _work(self) -> None:
+        while True:
+            delivery_id = self._next()
+            if delivery_id is None:
+                return
+            try:
+                self._deliver(delivery_id)
+            except Exception:
+                logger.exception("Outbox error for delivery %s", delivery_id)
+
+    def _claim(self, delivery_id: str) -> Optional[EmailDelivery]:
+        """
+        Take a delivery for one send attempt, or return None if it is not claimable
+        (already sent, failed, backing off, or claimed by another worker or process).
+        """
+        now = datetime.utcnow()
+        with SessionLocal() as db:
+            claimed = db.execute(
+                update(EmailDelivery)
+                .where(
+                    EmailDelivery.id == delivery_id,
+                    EmailDelivery.status.in_(("queued", "sending")),
+                    or_(EmailDelivery.available_at.is_(None), EmailDelivery.available_at <= now)
+                )
+                .values(
+                    status="sending",
+                    attempts=EmailDelivery.attempts + 1,
+                    available_at=now + timedelta(seconds=OUTBOX_LEASE_SECONDS)
+                )
+            ).rowcount == 1
+            db.commit()
+            return db.get(EmailDelivery, delivery_id) if claimed else None
+
+    def _deliver(self, delivery_id: str) -> None:
+        delivery = self._claim(delivery_id)
+        if delivery is None:
+            return
+
+        status, error, delay = "sent", None, None
+        conn = None
+        try:
+            settings = smtp_settings()
+            msg = build_message(delivery.subject, delivery.body, delivery.recipients, settings["user"])
+            with metrics.stage("email_send"):
+                conn = self.pool.acquire(settings)
+                refused = conn.sendmail(settings["user"], delivery.recipients, msg.as_string())
+            self.pool.release(conn)
+            if refused:
+                error = f"Refused recipients: {sorted(refused)}"
+        except Exception as e:
+            if conn is not None:
+                self.pool.release(conn, broken=True)
+            error = str(e) or type(e).__name__
+            if is_transient(e) and delivery.attempts < self.max_attempts:
+                status = "queued"
+                delay = OUTBOX_RETRY_BASE_DELAY * 2 ** (delivery.attempts - 1) * random.uniform(0.5, 1.0)
+            else:
+                status = "failed"
+
+        # Only record the outcome while the claim is still ours (same attempt, not taken over)
+        with SessionLocal() as db:
+            db.execute(
+                update(EmailDelivery)
+                .where(
+                    EmailDelivery.id == delivery_id,
+                    EmailDelivery.status == "sending",
+                    EmailDelivery.attempts == delivery.attempts
+                )
+                .values(
+                    status=status,
+                    error=error,
+                    available_at=datetime.utcnow() + timedelta(seconds=delay) if delay is not None else None
+                )
+            )
+            db.commit()
+        EMAILS.inc(result="retry" if delay is not None else status)
+
+        if delay is not None:
+            self._schedule(delivery_id, delay)
@@ -1,8 +1,23 @@
 SYSTEM_PROMPT = """You are a meticulous meeting summarizer. Output should be concise, faithful, and useful."""
 
-FUSE_PROMPT = """You are a coordinator that merges multiple partial meeting summaries.
-Return valid JSON with keys:
-structured  editable_text
-The structured object should include sections agenda decisions action_items owners deadlines risks open_questions.
-The editable_text is a clean markdown narrative ready to be emailed.
-Keep names and dates accurate. Remove duplicates. If items conflict, keep the version that has explicit evidence."""
+FUSE_PROMPT = """You are a coordinator that merges multiple partial meeting summaries into one structured summary.
+Return a single JSON object that matches the JSON schema given below, with overview as its first key.
+overview is a short narrative of the meeting in a few sentences; the other sections are lists.
+Keep names and dates accurate. Remove duplicates. If items conflict, keep the version that has explicit evidence.
+Use an empty list for a section with nothing to report."""
+
+MERGE_PROMPT = """You merge a group of partial meeting summaries into a single partial summary.
+Keep every agenda item, decision, action item, owner, deadline, risk and open question.
+Keep names and dates accurate. Remove duplicates. Output plain text, not JSON."""
+
+UPDATE_PROMPT = """You are a coordinator that keeps a meeting summary up to date while the meeting is still going.
+You receive the current summary as JSON and partial summaries of the newest part of the transcript.
+Return a single JSON object that matches the JSON schema given below, with overview as its first key.
+Keep everything in the current summary unless the new partials revise it, and add what is new.
+overview is a short narrative of the whole meeting so far in a few sentences; the other sections are lists.
+Keep names and dates accurate. Remove duplicates. If items conflict, keep the newer version when it has explicit evidence."""
+
+REPAIR_PROMPT = """You fix one section of a meeting summary that another model returned in the wrong shape.
+You receive the section's JSON schema and its current value.
+Return a JSON object with the section name as its only key and a value that matches the schema.
+Keep the content; change only what is needed to fit the schema. Do not add information."""
@@ -0,0 +1,352 @@
+import os
+import gzip
+import uuid
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, sessionmaker
+
+from chunking import smart_chunks
+from database import SessionLocal, init_db
+from models import Transcript, TranscriptChunk, Summary, SummaryCheckpoint
+from search import index_summaries, index_text
+
+try:
+    import zstandard
+except ImportError:  # optional: chunks fall back to gzip
+    zstandard = None
+
+# Codec for stored chunks: zstd (needs the zstandard package), gzip or none
+CHUNK_COMPRESSION = os.getenv("CHUNK_COMPRESSION", "zstd" if zstandard else "gzip")
+# Chunks read per query when iterating a stored transcript
+CHUNK_FETCH_SIZE = int(os.getenv("CHUNK_FETCH_SIZE", "32"))
+
+
+def pack_chunk(text: str) -> Tuple[str, bytes]:
+    data = text.encode("utf-8")
+    if CHUNK_COMPRESSION == "zstd" and zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=3).compress(data)
+    if CHUNK_COMPRESSION in ("zstd", "gzip"):
+        return "gzip", gzip.compress(data, compresslevel=6, mtime=0)
+    return "none", data
+
+
+def unpack_chunk(codec: str, data: bytes) -> str:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Transcript chunks are zstd-compressed; install the zstandard package")
+        data = zstandard.ZstdDecompressor().decompress(data)
+    elif codec == "gzip":
+        data = gzip.decompress(data)
+    return data.decode("utf-8")
+
+
+def chunk_rows(transcript_id: str, chunks: Iterable[str], start: int = 0) -> List[Dict[str, Any]]:
+    rows = []
+    for seq, chunk in enumerate(chunks, start):
+        codec, data = pack_chunk(chunk)
+        rows.append({"transcript_id": transcript_id, "seq": seq, "codec": codec, "data": data})
+    return rows
+
+
+def summary_to_dict(summary: Summary) -> Dict[str, Any]:
+    return {
+        "id": summary.id,
+        "transcript_id": summary.transcript_id,
+        "structured": summary.structured or {},
+        "editable_text": summary.editable_text,
+        "generated_text": summary.generated_text,
+    }
+
+
+class StoredChunks:
+    """
+    Lazy view of a transcript's stored chunks, from chunk `start` on.
+
+    len() is known up front. Iterating fetches and decompresses CHUNK_FETCH_SIZE
+    chunks per short query, so only a small window of the transcript is in
+    memory at a time. chunks[n:] returns a view that starts n chunks further in.
+    """
+
+    def __init__(self, session_factory: sessionmaker, transcript_id: str, count: int, start: int = 0):
+        self._session = session_factory
+        self.transcript_id = transcript_id
+        self.count = count
+        self.start = min(start, count)
+
+    def __len__(self) -> int:
+        return self.count - self.start
+
+    def __getitem__(self, item: slice) -> "StoredChunks":
+        if not isinstance(item, slice) or item.stop is not None or item.step is not None or (item.start or 0) < 0:
+            raise TypeError("StoredChunks only supports [start:] slices")
+        return StoredChunks(self._session, self.transcript_id, self.count, self.start + (item.start or 0))
+
+    def __iter__(self) -> Iterator[str]:
+        seq = self.start
+        while seq < self.count:
+            with self._session() as db:
+                rows = db.execute(
+                    select(TranscriptChunk.codec, TranscriptChunk.data)
+                    .where(
+                        TranscriptChunk.transcript_id == self.transcript_id,
+                        TranscriptChunk.seq >= seq,
+                        TranscriptChunk.seq < self.count
+                    )
+                    .order_by(TranscriptChunk.seq)
+                    .limit(CHUNK_FETCH_SIZE)
+                ).all()
+            if not rows:
+                return
+            for row in rows:
+                yield unpack_chunk(row.codec, row.data)
+            seq += len(rows)
+
+
+class Repository:
+    """
+    Storage for transcripts and summaries on top of the SQLAlchemy models.
+
+    Every method runs in its own short session so it is safe to call from
+    request handlers, job workers and the summarizer pool alike. Bulk
+    methods write all rows in one transaction with a single executemany.
+
+    Transcripts are chunked once, when they are written, and only the
+    compressed chunks are stored; appended text is chunked on its own and
+    added after the existing chunks, so earlier boundaries (and their cached
+    partials) never move. Transcripts written before chunks were stored keep
+    their text, and are chunked on first access.
+    """
+
+    def __init__(self, session_factory: sessionmaker = SessionLocal):
+        self._session = session_factory
+
+    # -----------------------------
+    # Transcripts
+    # -----------------------------
+    def add_transcript(self, text: str) -> str:
+        return self.add_transcripts([text])[0]
+
+    def add_transcripts(self, texts: List[str]) -> List[str]:
+        # Only the compressed chunks are kept; the body stays empty, as for streamed uploads
+        rows = [{"id": str(uuid.uuid4()), "text": ""} for _ in texts]
+        chunks = [c for row, text in zip(rows, texts) for c in chunk_rows(row["id"], smart_chunks(text))]
+        if rows:
+            with self._session() as db:
+                db.execute(insert(Transcript), rows)
+                if chunks:
+                    db.execute(insert(TranscriptChunk), chunks)
+                db.commit()
+        return [row["id"] for row in rows]
+
+    def start_transcript(self) -> str:
+        """
+        Create an empty transcript for a streamed upload; its text arrives through add_chunks().
+        """
+        transcript_id = str(uuid.uuid4())
+        with self._session() as db:
+            db.execute(insert(Transcript), [{"id": transcript_id, "text": ""}])
+            db.commit()
+        return transcript_id
+
+    def add_chunks(self, transcript_id: str, start: int, chunks: List[str]) -> None:
+        if chunks:
+            with self._session() as db:
+                db.execute(insert(TranscriptChunk), chunk_rows(transcript_id, chunks, start))
+                db.commit()
+
+    def delete_transcript(self, transcript_id: str) -> None:
+        with self._session() as db:
+            db.execute(delete(TranscriptChunk).where(TranscriptChunk.transcript_id == transcript_id))
+            db.execute(delete(Transcript).where(Transcript.id == transcript_id))
+            db.commit()
+
+    def append_transcript(self, transcript_id: str, text: str) -> Optional[Dict[str, int]]:
+        """
+        Append text to a stored transcript, chunking only the new text. Appends to
+        the same transcript are serialized, so each one continues after the last.
+        Returns the total and new chunk counts, or None if the transcript does not exist.
+        """
+        with self._session() as db:
+            if not self._lock_transcript(db, transcript_id):
+                return None
+            stored = self._count_chunks(db, [transcript_id]).get(transcript_id, 0)
+            if not stored:
+                stored = self._backfill_chunks(db, [transcript_id]).get(transcript_id, 0)
+
+            new_chunks = smart_chunks(text)
+            if new_chunks:
+                db.execute(insert(TranscriptChunk), chunk_rows(transcript_id, new_chunks, stored))
+            # Concatenate in SQL so the existing body is never read back (streamed uploads keep no body)
+            db.execute(
+                update(Transcript)
+                .where(Transcript.id == transcript_id, Transcript.text != "")
+                .values(text=Transcript.text + text)
+            )
+            db.commit()
+            return {"chunks": stored + len(new_chunks), "new_chunks": len(new_chunks)}
+
+    def _lock_transcript(self, db: Session, transcript_id: str) -> bool:
+        """
+        Open the transaction holding the write lock for this transcript, so concurrent
+        appends number their chunks one after the other. SQLite only has a database-wide
+        lock, taken up front with BEGIN IMMEDIATE (a deferred transaction that reads first
+        fails with SQLITE_BUSY once another writer commits); elsewhere the row is locked.
+        Returns whether the transcript exists.
+        """
+        query = select(Transcript.id).where(Transcript.id == transcript_id)
+        if db.get_bind().dialect.name == "sqlite":
+            db.connection().exec_driver_sql("BEGIN IMMEDIATE")
+        else:
+            query = query.with_for_update()
+        return db.scalar(query) is not None
+
+    def transcript_exists(self, transcript_id: str) -> bool:
+        with self._session() as db:
+            return db.scalar(select(Transcript.id).where(Transcript.id == transcript_id)) is not None
+
+    def get_chunks(self, transcript_id: str) -> Optional[StoredChunks]:
+        return self.get_chunks_many([transcript_id]).get(transcript_id)
+
+    def get_chunks_many(self, transcript_ids: List[str]) -> Dict[str, StoredChunks]:
+        """
+        Lazy views of the stored chunks of each existing transcript. Transcripts written
+        before chunks were stored are chunked on first access and backfilled.
+        """
+        if not transcript_ids:
+            return {}
+        with self._session() as db:
+            counts = self._count_chunks(db, list(set(transcript_ids)))
+            missing = set(transcript_ids) - set(counts)
+            if missing:
+                backfilled = self._backfill_chunks(db, list(missing))
+                try:
+                    db.commit()
+                except IntegrityError:
+                    # Another request backfilled the same transcript first; chunking is deterministic
+                    db.rollback()
+                counts.update(backfilled)
+        return {tid: StoredChunks(self._session, tid, count) for tid, count in counts.items()}
+
+    def _count_chunks(self, db: Session, transcript_ids: List[str]) -> Dict[str, int]:
+        rows = db.execute(
+            select(TranscriptChunk.transcript_id, func.count())
+            .where(TranscriptChunk.transcript_id.in_(transcript_ids))
+            .group_by(TranscriptChunk.transcript_id)
+        ).all()
+        return {tid: count for tid, count in rows}
+
+    def _backfill_chunks(self, db: Session, transcript_ids: List[str]) -> Dict[str, int]:
+        rows = db.execute(
+            select(Transcript.id, Transcript.text).where(Transcript.id.in_(transcript_ids))
+        ).all()
+        counts = {}
+        for row in rows:
+            chunks = chunk_rows(row.id, smart_chunks(row.text))
+            if chunks:
+                db.execute(insert(TranscriptChunk), chunks)
+            counts[row.id] = len(chunks)
+        return counts
+
+    # -----------------------------
+    # Summary checkpoints
+    # -----------------------------
+    def get_checkpoint(self, transcript_id: str, instruction_key: str) -> Optional[Dict[str, Any]]:
+        with self._session() as db:
+            checkpoint = db.get(SummaryCheckpoint, (transcript_id, instruction_key))
+            if checkpoint is None:
+                return None
+            return {
+                "chunk_count": checkpoint.chunk_count,
+                "structured": checkpoint.structured or {},
+                "editable_text": checkpoint.editable_text or "",
+            }
+
+    def save_checkpoint(
+        self,
+        transcript_id: str,
+        instruction_key: str,
+        chunk_count: int,
+        structured: Dict[str, Any],
+        editable_text: str
+    ) -> None:
+        """
+        Record the summary of the first chunk_count chunks, unless a checkpoint covering more already exists.
+        """
+        with self._session() as db:
+            checkpoint = db.get(SummaryCheckpoint, (transcript_id, instruction_key))
+            if checkpoint is None:
+                checkpoint = SummaryCheckpoint(transcript_id=transcript_id, instruction_key=instruction_key)
+                db.add(checkpoint)
+            elif checkpoint.chunk_count > chunk_count:
+                return
+            checkpoint.chunk_count = chunk_count
+            checkpoint.structured = structured
+            checkpoint.editable_text = editable_text
+            try:
+                db.commit()
+            except IntegrityError:
+                db.rollback()
+
+    # -----------------------------
+    # Summaries
+    # -----------------------------
+    def add_summary(self, transcript_id: str, structured: Dict[str, Any], editable_text: str) -> str:
+        return self.add_summaries([(transcript_id, structured, editable_text)])[0]
+
+    def add_summaries(self, items: List[Tuple[str, Dict[str, Any], str]]) -> List[str]:
+        rows = [
+            {
+                "id": str(uuid.uuid4()),
+                "transcript_id": transcript_id,
+                "structured": structured,
+                "editable_text": editable_text,
+                "generated_text": editable_text,
+            }
+            for transcript_id, structured, editable_text in items
+        ]
+        if rows:
+            # Whether the full-text index exists is only known once the schema is set up,
+            # and that has to happen before this transaction takes SQLite's write lock
+            init_db()
+            with self._session() as db:
+                db.execute(insert(Summary), rows)
+                index_summaries(db, rows)
+                db.commit()
+        return [row["id"] for row in rows]
+
+    def get_summary(self, summary_id: str) -> Optional[Dict[str, Any]]:
+        with self._session() as db:
+            summary = db.get(Summary, summary_id)
+            return summary_to_dict(summary) if summary else None
+
+    def update_summary_text(
+        self,
+        summary_id: str,
+        edited_text: str,
+        structured: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """
+        Save an edited summary and re-index it. The action items and deadlines
+        are only re-indexed when a new structured summary is given.
+        """
+        values = {"editable_text": edited_text}
+        if structured is not None:
+            values["structured"] = structured
+        init_db()
+        with self._session() as db:
+            transcript_id = db.scalar(
+                update(Summary).where(Summary.id == summary_id).values(**values).returning(Summary.transcript_id)
+            )
+            if transcript_id is None:
+                return False
+            if structured is not None:
+                index_summaries(db, [{"id": summary_id, "transcript_id": transcript_id, **values}], replace=True)
+            else:
+                index_text(db, [(summary_id, edited_text)])
+            db.commit()
+            return True
+
+
+repo = Repository()
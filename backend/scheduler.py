@@ -0,0 +1,239 @@
+import os
+import time
+import json
+import heapq
+import random
+import itertools
+import threading
+from concurrent.futures import Future
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from cache import cache_key
+
+# Lower number = served first. Fuse/merge calls finish a request, map calls start one,
+# and batch work yields to both.
+PRIORITY_FUSE = 0
+PRIORITY_MAP = 1
+PRIORITY_BATCH = 2
+
+
+class TokenBucket:
+    """
+    Classic token bucket refilled continuously at `per_minute` units per minute.
+    A non-positive rate disables the limit.
+    """
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.capacity <= 0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, n: float, now: float) -> float:
+        if self.unlimited:
+            return 0.0
+        self._refill(now)
+        n = min(n, self.capacity)
+        return 0.0 if self.tokens >= n else (n - self.tokens) / self.rate
+
+    def take(self, n: float, now: float) -> None:
+        if self.unlimited:
+            return
+        self._refill(now)
+        self.tokens -= min(n, self.capacity)
+
+    def drain(self, now: float) -> None:
+        if not self.unlimited:
+            self._refill(now)
+            self.tokens = min(self.tokens, 0.0)
+
+
+def retry_after_seconds(exc: Exception) -> Optional[float]:
+    """
+    Read retry-after-ms / retry-after (seconds or HTTP date) from an SDK error's response.
+    """
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000.0
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+def default_retryable(exc: Exception) -> bool:
+    status = getattr(exc, "status_code", None)
+    return status in (408, 409, 429) or (status is not None and status >= 500)
+
+
+class GroqScheduler:
+    """
+    Shared gate in front of every model call.
+
+    - Requests-per-minute and tokens-per-minute budgets are enforced with token
+      buckets; each call is charged its estimated prompt + completion tokens.
+    - Waiting calls are served strictly by (priority, arrival order).
+    - Retryable failures back off exponentially with jitter; a 429 pauses the
+      whole scheduler for at least the server's retry-after instead of letting
+      every caller hammer the API independently.
+    - Identical in-flight calls are coalesced onto a single request.
+    """
+
+    def __init__(
+        self,
+        rpm: int = 0,
+        tpm: int = 0,
+        max_retries: int = 5,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        retryable: Callable[[Exception], bool] = default_retryable
+    ):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retryable = retryable
+        self._requests = TokenBucket(rpm)
+        self._tokens = TokenBucket(tpm)
+        self._blocked_until = 0.0
+        self._cond = threading.Condition()
+        self._waiting = []  # heap of (priority, seq)
+        self._seq = itertools.count()
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+        # calls, retries and rate_limited change under _cond; coalesced under _inflight_lock
+        self.stats = {"calls": 0, "retries": 0, "rate_limited": 0, "coalesced": 0}
+
+    # -----------------------------
+    # Budgeting
+    # -----------------------------
+    def acquire(self, cost: int, priority: int = PRIORITY_MAP) -> None:
+        """
+        Block until this caller is first in line and both buckets can cover `cost`.
+        """
+        with self._cond:
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    if self._waiting[0] != ticket:
+                        self._cond.wait()
+                        continue
+                    now = time.monotonic()
+                    wait = max(
+                        self._blocked_until - now,
+                        self._requests.wait_time(1, now),
+                        self._tokens.wait_time(cost, now)
+                    )
+                    if wait <= 0:
+                        self._requests.take(1, now)
+                        self._tokens.take(cost, now)
+                        self.stats["calls"] += 1
+                        return
+                    self._cond.wait(wait)
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+
+    def depth(self) -> int:
+        """
+        Callers waiting in acquire() for their turn or for budget.
+        """
+        with self._cond:
+            return len(self._waiting)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Hold back every caller for `seconds` and empty the buckets (after a 429).
+        """
+        with self._cond:
+            self.stats["rate_limited"] += 1
+            now = time.monotonic()
+            self._blocked_until = max(self._blocked_until, now + seconds)
+            self._requests.drain(now)
+            self._tokens.drain(now)
+            self._cond.notify_all()
+
+    # -----------------------------
+    # Calls
+    # -----------------------------
+    def run(self, fn: Callable[[], Any], cost: int, priority: int = PRIORITY_MAP) -> Any:
+        """
+        Run fn() within the rate budget, retrying retryable failures.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.acquire(cost, priority)
+            try:
+                return fn()
+            except Exception as e:
+                if attempt == self.max_retries or not self.retryable(e):
+                    raise
+                with self._cond:
+                    self.stats["retries"] += 1
+                delay = min(self.max_delay, self.base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+                if getattr(e, "status_code", None) == 429:
+                    self.pause(max(delay, retry_after_seconds(e) or 0.0))
+                else:
+                    time.sleep(delay)
+
+    def call(self, fn: Callable[..., Any], messages: List[Dict[str, str]], cost: int, priority: int = PRIORITY_MAP, **kwargs) -> Any:
+        """
+        Run fn(messages, **kwargs) via run(), sharing the result with identical concurrent calls.
+        """
+        key = cache_key(json.dumps(messages, sort_keys=True), json.dumps(kwargs, sort_keys=True, default=str))
+        with self._inflight_lock:
+            fut = self._inflight.get(key)
+            owner = fut is None
+            if owner:
+                fut = self._inflight[key] = Future()
+            else:
+                self.stats["coalesced"] += 1
+        if not owner:
+            return fut.result()
+
+        try:
+            result = self.run(lambda: fn(messages, **kwargs), cost, priority)
+            fut.set_result(result)
+            return result
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+
+
+def make_scheduler(retryable: Callable[[Exception], bool] = default_retryable) -> GroqScheduler:
+    """
+    Build a scheduler from GROQ_RPM / GROQ_TPM (0 = no client-side limit),
+    GROQ_MAX_RETRIES, GROQ_RETRY_BASE_DELAY and GROQ_RETRY_MAX_DELAY.
+    """
+    return GroqScheduler(
+        rpm=int(os.getenv("GROQ_RPM", "0")),
+        tpm=int(os.getenv("GROQ_TPM", "0")),
+        max_retries=int(os.getenv("GROQ_MAX_RETRIES", "5")),
+        base_delay=float(os.getenv("GROQ_RETRY_BASE_DELAY", "0.5")),
+        max_delay=float(os.getenv("GROQ_RETRY_MAX_DELAY", "30")),
+        retryable=retryable
+    )
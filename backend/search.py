@@ -0,0 +1,548 @@
+import os
+import re
+import argparse
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, or_, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session, sessionmaker
+
+import database
+from database import SessionLocal, init_db
+from models import Summary, IndexedSummary, Owner, ActionItem, Deadline
+from structured import DEADLINE_SPLIT, DONE_STATUSES
+
+# Largest page a search endpoint returns
+MAX_PAGE_SIZE = 100
+# Matches ranked by relevance search, newest first; older matches are left out
+RELEVANCE_CANDIDATES = int(os.getenv("SEARCH_RELEVANCE_CANDIDATES", "5000"))
+# Summaries indexed per transaction by reindex()
+REINDEX_BATCH_SIZE = 500
+
+MONTHS = {m: i for i, m in enumerate(
+    ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), 1
+)}
+_MONTH = r"(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?"
+_DAY = r"(\d{1,2})(?:st|nd|rd|th)?"
+ISO_DATE = re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b")
+MONTH_DAY = re.compile(_MONTH + r"\s+" + _DAY + r"\b(?:,?\s+(\d{4}))?", re.I)
+DAY_MONTH = re.compile(r"\b" + _DAY + r"\s+(?:of\s+)?" + _MONTH + r"(?:,?\s+(\d{4}))?", re.I)
+
+# Labelled fields inside a free-text action item, e.g. "Send the deck (owner: Priya, due: May 3)"
+OWNER_LABEL = re.compile(r"\b(?:owner|assignee|assigned to|responsible)\s*[:=-]\s*([^,;()\[\]]+)", re.I)
+DUE_LABEL = re.compile(r"\b(?:due(?:\s+date)?|deadline|eta)\s*[:=-]?\s*([^,;()\[\]]+)", re.I)
+DUE_BY = re.compile(r"\bby\s+([^,;()\[\]]+)", re.I)
+# "Priya: send the deck" / "Priya - send the deck"
+LEADING_OWNER = re.compile(r"^([A-Z][\w.'-]*(?:\s+[A-Z][\w.'-]*){0,2})\s*(?::|\s[-–—])\s+(.+)$")
+BULLET = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s*")
+
+NO_OWNER = {"", "tbd", "tba", "unassigned", "none", "n/a", "na", "unknown", "?"}
+
+TASK_KEYS = ("task", "action", "item", "description", "title", "what", "text")
+OWNER_KEYS = ("owner", "owners", "assignee", "assigned_to", "responsible", "who", "name")
+DUE_KEYS = ("deadline", "due", "due_date", "date", "when", "by")
+
+
+# -----------------------------
+# Normalizing structured summaries
+# -----------------------------
+def owner_key(name: str) -> str:
+    return " ".join(name.lower().split())
+
+
+def parse_date(value: Any, today: Optional[date] = None) -> Optional[date]:
+    """
+    Calendar date written in a deadline, e.g. "2024-05-03", "May 3, 2024" or "3rd of May".
+    A date without a year gets the year that puts it closest to today. Relative
+    deadlines ("Friday", "next sprint") depend on when the meeting was held and
+    are left unresolved.
+    """
+    if not isinstance(value, str):
+        return None
+    try:
+        m = ISO_DATE.search(value)
+        if m:
+            return date(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+        m = MONTH_DAY.search(value)
+        if m:
+            month, day, year = m.group(1), m.group(2), m.group(3)
+        else:
+            m = DAY_MONTH.search(value)
+            if not m:
+                return None
+            day, month, year = m.group(1), m.group(2), m.group(3)
+        month, day = MONTHS[month.lower()[:3]], int(day)
+        if year:
+            return date(int(year), month, day)
+        today = today or date.today()
+        candidates = []
+        for y in (today.year - 1, today.year, today.year + 1):
+            try:
+                candidates.append(date(y, month, day))
+            except ValueError:
+                pass
+        return min(candidates, key=lambda d: abs((d - today).days)) if candidates else None
+    except ValueError:
+        return None
+
+
+def _section_key(name: Any) -> str:
+    return re.sub(r"[\s-]+", "_", str(name).strip().lower())
+
+
+def _sections(structured: Any) -> Dict[str, Any]:
+    """
+    Sections of a structured summary by normalized name. The model returns them as
+    top-level keys, a "sections" object, or a "sections" list of {title, items}.
+    """
+    found = {}
+    if not isinstance(structured, dict):
+        return found
+    for name, value in structured.items():
+        if name != "sections":
+            found.setdefault(_section_key(name), value)
+    sections = structured.get("sections")
+    if isinstance(sections, dict):
+        for name, value in sections.items():
+            found.setdefault(_section_key(name), value)
+    elif isinstance(sections, list):
+        for section in sections:
+            if isinstance(section, dict):
+                title = section.get("title") or section.get("name") or section.get("heading")
+                if title:
+                    found.setdefault(_section_key(title), section.get("items", section.get("content")))
+    return found
+
+
+def _first(sections: Dict[str, Any], names: Iterable[str]) -> Any:
+    for name in names:
+        if sections.get(name):
+            return sections[name]
+    return None
+
+
+def _items(value: Any) -> List[Any]:
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return value
+    if isinstance(value, str):
+        lines = (BULLET.sub("", line).strip() for line in value.splitlines())
+        return [line for line in lines if line]
+    return [value]
+
+
+def _field(item: Dict[str, Any], keys: Iterable[str]) -> Optional[str]:
+    for key in keys:
+        value = item.get(key)
+        if isinstance(value, list):
+            value = ", ".join(str(v) for v in value if v)
+        if value not in (None, ""):
+            return str(value).strip()
+    return None
+
+
+def _clean_owner(name: Optional[str]) -> Optional[str]:
+    if not name:
+        return None
+    name = name.strip().strip("@").strip(" .:-")[:200]
+    return None if name.lower() in NO_OWNER else name
+
+
+def _status(value: Any) -> str:
+    if value is True:
+        return "done"
+    if isinstance(value, str) and value.strip().lower() in DONE_STATUSES:
+        return "done"
+    return "open"
+
+
+def _due_from_text(task: str) -> Optional[str]:
+    m = DUE_LABEL.search(task)
+    if m:
+        return m.group(1).strip()
+    # "by" also introduces people ("reviewed by Sam"); only trust it in front of a date
+    for m in DUE_BY.finditer(task):
+        if parse_date(m.group(1)):
+            return m.group(1).strip()
+    return None
+
+
+def _action_item(item: Any, today: date) -> Optional[Dict[str, Any]]:
+    if isinstance(item, dict):
+        task = _field(item, TASK_KEYS)
+        owner = _field(item, OWNER_KEYS)
+        due_text = _field(item, DUE_KEYS)
+        status = _status(item.get("status", item.get("done", item.get("completed"))))
+    elif isinstance(item, str):
+        task, owner, status = item.strip(), None, "open"
+        for mark in ("[x]", "[X]", "✅"):
+            if task.startswith(mark):
+                task, status = task[len(mark):].strip(), "done"
+        m = OWNER_LABEL.search(task)
+        if m:
+            owner = m.group(1)
+        else:
+            m = LEADING_OWNER.match(task)
+            if m:
+                owner, task = m.group(1), m.group(2)
+        due_text = _due_from_text(task)
+    else:
+        return None
+    if not task:
+        return None
+    return {
+        "task": task,
+        "owner": _clean_owner(owner),
+        "due_text": due_text,
+        "due_date": parse_date(due_text, today),
+        "status": status,
+    }
+
+
+def _deadline(item: Any, today: date) -> Optional[Dict[str, Any]]:
+    if isinstance(item, dict):
+        description = _field(item, TASK_KEYS) or _field(item, ("milestone", "deliverable"))
+        due_text = _field(item, DUE_KEYS)
+    elif isinstance(item, str):
+        description = item.strip()
+        m = DEADLINE_SPLIT.match(description)
+        due_text = m.group(2) if m and parse_date(m.group(2), today) else _due_from_text(description)
+    else:
+        return None
+    if not description:
+        return None
+    return {"description": description, "due_text": due_text, "due_date": parse_date(due_text, today)}
+
+
+def normalize_structured(structured: Any, today: Optional[date] = None) -> Dict[str, List[Any]]:
+    """
+    Action items, deadlines and owner names of a structured summary as flat rows:
+    {"action_items": [{task, owner, due_text, due_date, status}],
+     "deadlines": [{description, due_text, due_date}], "owners": [name]}.
+    Tolerant of the shapes the model produces; anything unrecognised is skipped.
+    """
+    today = today or date.today()
+    sections = _sections(structured)
+    actions = _first(sections, ("action_items", "actions", "tasks", "next_steps", "todos", "to_dos"))
+    owners = _first(sections, ("owners", "assignees", "responsibilities"))
+    deadlines = _first(sections, ("deadlines", "due_dates", "milestones"))
+
+    # Owners are often given as {name: [tasks]} or [{name, items}]; use them as the
+    # action items when the summary has no separate list
+    owner_tasks = []
+    if isinstance(owners, dict):
+        owner_tasks = [(name, tasks) for name, tasks in owners.items()]
+    elif isinstance(owners, list):
+        for entry in owners:
+            if isinstance(entry, dict) and _field(entry, OWNER_KEYS):
+                owner_tasks.append((_field(entry, OWNER_KEYS), entry.get("items", entry.get("tasks", entry.get("responsibilities")))))
+            elif isinstance(entry, str):
+                m = LEADING_OWNER.match(entry.strip())
+                owner_tasks.append((m.group(1), m.group(2)) if m else (entry, None))
+
+    items = [a for a in (_action_item(i, today) for i in _items(actions)) if a]
+    if not items:
+        for name, tasks in owner_tasks:
+            for task in _items(tasks):
+                item = _action_item(task, today)
+                if item:
+                    item["owner"] = item["owner"] or _clean_owner(str(name))
+                    items.append(item)
+
+    if isinstance(deadlines, dict):
+        deadlines = [{"description": k, "due": v} for k, v in deadlines.items()]
+    deadline_rows = [d for d in (_deadline(i, today) for i in _items(deadlines)) if d]
+
+    names = {}
+    for name in [i["owner"] for i in items] + [_clean_owner(str(n)) for n, _ in owner_tasks]:
+        if name and len(name) <= 80:
+            names.setdefault(owner_key(name), name)
+    return {"action_items": items, "deadlines": deadline_rows, "owners": list(names.values())}
+
+
+# -----------------------------
+# Writing the index (inside the caller's transaction)
+# -----------------------------
+def _owner_ids(db: Session, names: List[str]) -> Dict[str, int]:
+    wanted = {owner_key(n): n for n in names}
+    if not wanted:
+        return {}
+    ids = dict(db.execute(select(Owner.name_key, Owner.id).where(Owner.name_key.in_(wanted))).all())
+    missing = [{"name": name, "name_key": key} for key, name in wanted.items() if key not in ids]
+    if missing:
+        # Another transaction may add the same owner concurrently; keep whichever row lands first
+        if db.bind.dialect.name == "postgresql":
+            stmt = postgresql.insert(Owner).on_conflict_do_nothing(index_elements=["name_key"])
+        else:
+            stmt = insert(Owner).prefix_with("OR IGNORE", dialect="sqlite")
+        db.execute(stmt, missing)
+        ids.update(db.execute(
+            select(Owner.name_key, Owner.id).where(Owner.name_key.in_([m["name_key"] for m in missing]))
+        ).all())
+    return ids
+
+
+def index_text(db: Session, texts: List[Tuple[str, str]]) -> None:
+    """
+    Add or replace the full-text entries of (summary_id, editable_text) pairs.
+    Call init_db() before the transaction: until then HAS_FTS5 is unset, and the
+    summaries would be recorded as indexed without any full-text entry.
+    """
+    if not texts:
+        return
+    summary_ids = [summary_id for summary_id, _ in texts]
+    rowids = dict(db.execute(
+        select(IndexedSummary.summary_id, IndexedSummary.id).where(IndexedSummary.summary_id.in_(summary_ids))
+    ).all())
+    new = [summary_id for summary_id in summary_ids if summary_id not in rowids]
+    if new:
+        db.execute(insert(IndexedSummary), [{"summary_id": summary_id} for summary_id in new])
+        rowids.update(db.execute(
+            select(IndexedSummary.summary_id, IndexedSummary.id).where(IndexedSummary.summary_id.in_(new))
+        ).all())
+    if not database.HAS_FTS5:
+        return
+    # REPLACE also restores entries that are missing, e.g. for summaries indexed before summary_fts existed
+    db.execute(
+        text("INSERT OR REPLACE INTO summary_fts (rowid, body) VALUES (:rowid, :body)"),
+        [{"rowid": rowids[sid], "body": body or ""} for sid, body in texts]
+    )
+
+
+def index_summaries(db: Session, rows: List[Dict[str, Any]], replace: bool = False) -> None:
+    """
+    Index summaries given as {id, transcript_id, structured, editable_text}: their text,
+    action items, owners and deadlines. With replace=True, rows from an earlier
+    version of the same summaries are dropped first.
+    """
+    if not rows:
+        return
+    if replace:
+        summary_ids = [row["id"] for row in rows]
+        db.execute(delete(ActionItem).where(ActionItem.summary_id.in_(summary_ids)))
+        db.execute(delete(Deadline).where(Deadline.summary_id.in_(summary_ids)))
+
+    normalized = [(row, normalize_structured(row["structured"])) for row in rows]
+    owner_ids = _owner_ids(db, [name for _, n in normalized for name in n["owners"]])
+    actions, deadlines = [], []
+    for row, n in normalized:
+        for position, item in enumerate(n["action_items"]):
+            actions.append({
+                "summary_id": row["id"],
+                "transcript_id": row["transcript_id"],
+                "position": position,
+                "task": item["task"],
+                "owner_id": owner_ids.get(owner_key(item["owner"])) if item["owner"] else None,
+                "due_date": item["due_date"],
+                "due_text": item["due_text"],
+                "status": item["status"],
+            })
+        for item in n["deadlines"]:
+            deadlines.append({"summary_id": row["id"], **item})
+    if actions:
+        db.execute(insert(ActionItem), actions)
+    if deadlines:
+        db.execute(insert(Deadline), deadlines)
+    index_text(db, [(row["id"], row["editable_text"]) for row in rows])
+
+
+# -----------------------------
+# Queries
+# -----------------------------
+def fts_query(q: str) -> str:
+    """
+    FTS5 MATCH expression for user input: every word (or "quoted phrase") must
+    match; a trailing * matches a prefix. Operators in the input are not interpreted.
+    """
+    terms = []
+    for phrase, word in re.findall(r'"([^"]*)"|(\S+)', q):
+        if phrase.strip():
+            terms.append('"' + phrase.strip() + '"')
+            continue
+        prefix = word.endswith("*")
+        word = " ".join(re.findall(r"\w+", word))
+        if word:
+            terms.append('"' + word + '"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+def _page(rows: List[Dict[str, Any]], limit: int, offset: int) -> Dict[str, Any]:
+    # One extra row was fetched to tell whether another page exists without counting
+    return {"results": rows[:limit], "limit": limit, "offset": offset, "has_more": len(rows) > limit}
+
+
+def _due_date_page(db: Session, stmt, due, tiebreak, limit: int, offset: int, dated_only: bool) -> Dict[str, Any]:
+    """
+    One page of stmt ordered by due date, undated rows last. Sorting on `due IS NULL`
+    would sort every matching row; instead dated rows are read in index order and
+    the undated ones (also in index order) continue the page once they run out.
+    """
+    dated = stmt.where(due.is_not(None))
+    rows = db.execute(dated.order_by(due, tiebreak).limit(limit + 1).offset(offset)).mappings().all()
+    if len(rows) <= limit and not dated_only:
+        if rows or not offset:
+            skip = 0
+        else:
+            # The page starts past the dated rows; count them to know how far into the undated ones
+            skip = offset - db.scalar(select(func.count()).select_from(dated.subquery()))
+        rows += db.execute(
+            stmt.where(due.is_(None)).order_by(tiebreak).limit(limit + 1 - len(rows)).offset(skip)
+        ).mappings().all()
+    return _page([dict(row) for row in rows], limit, offset)
+
+
+def _snippet(body: str, terms: List[str], width: int = 160) -> str:
+    lowered = body.lower()
+    hits = [i for i in (lowered.find(t.lower()) for t in terms) if i >= 0]
+    start = max(min(hits) - width // 4, 0) if hits else 0
+    snippet = body[start:start + width]
+    return ("..." if start else "") + snippet + ("..." if start + width < len(body) else "")
+
+
+class SearchIndex:
+    """
+    Queries over the search index: full-text search of summary text, and
+    filtered listings of action items and deadlines. Every query is a single
+    indexed lookup returning one page (limit rows from offset).
+    """
+
+    def __init__(self, session_factory: sessionmaker = SessionLocal):
+        self._session = session_factory
+
+    def summaries(self, q: str, limit: int = 20, offset: int = 0, sort: str = "relevance") -> Dict[str, Any]:
+        """
+        Summaries whose text matches q, by relevance (bm25, among the newest
+        RELEVANCE_CANDIDATES matches) or most recently indexed first.
+        """
+        match = fts_query(q)
+        if not match:
+            raise ValueError("Search query has no words")
+        with self._session() as db:
+            if database.HAS_FTS5:
+                params = {"match": match, "limit": limit + 1, "offset": offset}
+                if sort == "relevance":
+                    # bm25 has to score every match before sorting; bound that to the newest
+                    # RELEVANCE_CANDIDATES matches so broad queries stay fast
+                    params["cutoff"] = db.scalar(text(
+                        "SELECT min(rowid) FROM (SELECT rowid FROM summary_fts WHERE summary_fts MATCH :match "
+                        "ORDER BY rowid DESC LIMIT :candidates)"
+                    ), {"match": match, "candidates": RELEVANCE_CANDIDATES}) or 0
+                    where, order = "AND summary_fts.rowid >= :cutoff", "rank"
+                else:
+                    where, order = "", "summary_fts.rowid DESC"
+                rows = db.execute(text(
+                    "SELECT i.summary_id, s.transcript_id, "
+                    "snippet(summary_fts, 0, '**', '**', '...', 24) AS snippet "
+                    "FROM summary_fts "
+                    "JOIN indexed_summaries i ON i.id = summary_fts.rowid "
+                    "JOIN summaries s ON s.id = i.summary_id "
+                    f"WHERE summary_fts MATCH :match {where} ORDER BY {order} LIMIT :limit OFFSET :offset"
+                ), params).mappings().all()
+                return _page([dict(row) for row in rows], limit, offset)
+
+            terms = [t.strip('"*') for t in re.findall(r'"[^"]*"\*?', match)]
+            stmt = select(Summary.id, Summary.transcript_id, Summary.editable_text).join(
+                IndexedSummary, IndexedSummary.summary_id == Summary.id
+            )
+            for term in terms:
+                escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+                stmt = stmt.where(Summary.editable_text.ilike(f"%{escaped}%", escape="\\"))
+            stmt = stmt.order_by(IndexedSummary.id.desc()).limit(limit + 1).offset(offset)
+            rows = [
+                {"summary_id": row.id, "transcript_id": row.transcript_id, "snippet": _snippet(row.editable_text or "", terms)}
+                for row in db.execute(stmt)
+            ]
+            return _page(rows, limit, offset)
+
+    def action_items(
+        self,
+        owner: Optional[str] = None,
+        status: Optional[str] = None,
+        due_from: Optional[date] = None,
+        due_to: Optional[date] = None,
+        transcript_id: Optional[str] = None,
+        limit: int = 20,
+        offset: int = 0
+    ) -> Dict[str, Any]:
+        """
+        Action items matching every given filter, soonest deadline first. Items without
+        a date sort last and are left out as soon as a date range is given.
+        """
+        with self._session() as db:
+            stmt = select(
+                ActionItem.summary_id, ActionItem.transcript_id, ActionItem.task, Owner.name.label("owner"),
+                ActionItem.due_date, ActionItem.due_text, ActionItem.status
+            ).outerjoin(Owner, Owner.id == ActionItem.owner_id)
+            if owner is not None:
+                # Resolve the owner first so the query runs off the (owner, status, due_date) index
+                owner_id = db.scalar(select(Owner.id).where(Owner.name_key == owner_key(owner)))
+                if owner_id is None:
+                    return _page([], limit, offset)
+                stmt = stmt.where(ActionItem.owner_id == owner_id)
+            if status is not None:
+                stmt = stmt.where(ActionItem.status == status)
+            if transcript_id is not None:
+                stmt = stmt.where(ActionItem.transcript_id == transcript_id)
+            if due_from is not None:
+                stmt = stmt.where(ActionItem.due_date >= due_from)
+            if due_to is not None:
+                stmt = stmt.where(ActionItem.due_date <= due_to)
+            dated_only = due_from is not None or due_to is not None
+            return _due_date_page(db, stmt, ActionItem.due_date, ActionItem.id, limit, offset, dated_only)
+
+    def deadlines(
+        self,
+        due_from: Optional[date] = None,
+        due_to: Optional[date] = None,
+        limit: int = 20,
+        offset: int = 0
+    ) -> Dict[str, Any]:
+        with self._session() as db:
+            stmt = select(Deadline.summary_id, Deadline.description, Deadline.due_date, Deadline.due_text)
+            if due_from is not None:
+                stmt = stmt.where(Deadline.due_date >= due_from)
+            if due_to is not None:
+                stmt = stmt.where(Deadline.due_date <= due_to)
+            dated_only = due_from is not None or due_to is not None
+            return _due_date_page(db, stmt, Deadline.due_date, Deadline.id, limit, offset, dated_only)
+
+    def reindex(self, batch_size: int = REINDEX_BATCH_SIZE) -> int:
+        """
+        Index summaries stored before the search index existed, or indexed while
+        summary_fts did not exist yet. Returns how many were added.
+        """
+        init_db()
+        unindexed = IndexedSummary.id.is_(None)
+        if database.HAS_FTS5:
+            unindexed = or_(unindexed, text(
+                "NOT EXISTS (SELECT 1 FROM summary_fts WHERE summary_fts.rowid = indexed_summaries.id)"
+            ))
+        total = 0
+        while True:
+            with self._session() as db:
+                rows = db.execute(
+                    select(Summary.id, Summary.transcript_id, Summary.structured, Summary.editable_text)
+                    .outerjoin(IndexedSummary, IndexedSummary.summary_id == Summary.id)
+                    .where(unindexed)
+                    .limit(batch_size)
+                ).mappings().all()
+                if not rows:
+                    return total
+                index_summaries(db, [dict(row) for row in rows], replace=True)
+                db.commit()
+            total += len(rows)
+
+
+search_index = SearchIndex()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the summary search index.")
+    parser.add_argument("--reindex", action="store_true", help="index summaries that are not indexed yet")
+    args = parser.parse_args()
+    if args.reindex:
+        print(f"Indexed {search_index.reindex()} summaries")
+    else:
+        parser.print_help()
@@ -0,0 +1,186 @@
+import re
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, ConfigDict, ValidationError, field_validator
+
+DONE_STATUSES = {"done", "complete", "completed", "closed", "resolved", "finished"}
+# A deadline written as one string, "Launch: 2025-07-01" or "Launch — July 1"
+DEADLINE_SPLIT = re.compile(r"^(.+?)\s*[:–—]\s+(.+)$")
+SUMMARY_HEADING = "# Meeting Summary\n\n"
+
+
+# -----------------------------
+# Schema of the fuse output
+# -----------------------------
+class SummaryActionItem(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
+    task: str
+    owner: Optional[str] = None
+    deadline: Optional[str] = None
+    status: str = "open"
+
+    @field_validator("status", mode="before")
+    @classmethod
+    def _status(cls, value: Any) -> str:
+        return "done" if value is True or str(value).strip().lower() in DONE_STATUSES else "open"
+
+
+class SummaryDeadline(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
+    item: str
+    deadline: str
+
+
+class StructuredSummary(BaseModel):
+    """
+    What the fuse call returns. Every section has a default, so each one can be
+    validated on its own and a broken section does not take the others with it.
+    """
+
+    model_config = ConfigDict(extra="ignore")
+
+    overview: str = ""
+    agenda: List[str] = []
+    decisions: List[str] = []
+    action_items: List[SummaryActionItem] = []
+    owners: List[str] = []
+    deadlines: List[SummaryDeadline] = []
+    risks: List[str] = []
+    open_questions: List[str] = []
+
+    @field_validator("overview", mode="before")
+    @classmethod
+    def _overview(cls, value: Any) -> Any:
+        if isinstance(value, list) and all(isinstance(v, str) for v in value):
+            return "\n\n".join(value)
+        return value
+
+    @field_validator("agenda", "decisions", "owners", "risks", "open_questions", mode="before")
+    @classmethod
+    def _text_list(cls, value: Any) -> Any:
+        return [value] if isinstance(value, str) else value
+
+    @field_validator("action_items", mode="before")
+    @classmethod
+    def _action_items(cls, value: Any) -> Any:
+        if isinstance(value, (str, dict)):
+            value = [value]
+        if isinstance(value, list):
+            return [{"task": v} if isinstance(v, str) else v for v in value]
+        return value
+
+    @field_validator("deadlines", mode="before")
+    @classmethod
+    def _deadlines(cls, value: Any) -> Any:
+        if isinstance(value, dict) and "item" not in value:
+            # {"Launch": "2025-07-01"}
+            value = [{"item": k, "deadline": v} for k, v in value.items()]
+        elif isinstance(value, (str, dict)):
+            value = [value]
+        if isinstance(value, list):
+            coerced = []
+            for v in value:
+                # "Launch: 2025-07-01"
+                m = DEADLINE_SPLIT.match(v) if isinstance(v, str) else None
+                coerced.append({"item": m.group(1), "deadline": m.group(2)} if m else v)
+            return coerced
+        return value
+
+
+SECTIONS = list(StructuredSummary.model_fields)
+SUMMARY_SCHEMA = json.dumps(StructuredSummary.model_json_schema(), separators=(",", ":"))
+
+
+def section_schema(name: str) -> str:
+    """
+    JSON schema of {name: section} for the repair prompt; any name that is not
+    a section (e.g. "summary") gets the schema of the whole summary.
+    """
+    schema = StructuredSummary.model_json_schema()
+    defs = schema.pop("$defs", None)
+    value = schema["properties"].get(name, schema)
+    section = {"type": "object", "properties": {name: value}, "required": [name]}
+    if defs:
+        section["$defs"] = defs
+    return json.dumps(section, separators=(",", ":"))
+
+
+# -----------------------------
+# Parsing and validation
+# -----------------------------
+def load_json_object(text: str) -> Optional[Dict[str, Any]]:
+    """
+    The JSON object in a model reply, also when it is wrapped in a code fence or prose.
+    """
+    for candidate in (text, text[text.find("{"):text.rfind("}") + 1]):
+        try:
+            data = json.loads(candidate)
+        except ValueError:
+            continue
+        if isinstance(data, dict):
+            # The model sometimes keeps the older {"structured": ..., "editable_text": ...} wrapper
+            if isinstance(data.get("structured"), dict):
+                data = dict(data["structured"], overview=data["structured"].get("overview") or data.get("editable_text", ""))
+            return data
+    return None
+
+
+def validate_sections(data: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Validate each section of a fuse reply on its own.
+    Returns (valid sections as plain data, {name: raw value} of the sections that failed).
+    Missing sections are left to their defaults; unknown keys are ignored.
+    """
+    valid, broken = {}, {}
+    for name in SECTIONS:
+        if data.get(name) is None:
+            continue
+        try:
+            section = StructuredSummary.model_validate({name: data[name]})
+        except ValidationError:
+            broken[name] = data[name]
+            continue
+        valid[name] = section.model_dump()[name]
+    return valid, broken
+
+
+def complete(sections: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    A full structured summary from validated sections, with defaults for the rest.
+    """
+    return StructuredSummary.model_validate(sections).model_dump()
+
+
+# -----------------------------
+# Editable text
+# -----------------------------
+def _bullets(title: str, items: List[str]) -> List[str]:
+    return [f"## {title}"] + [f"- {item}" for item in items] + [""] if items else []
+
+
+def render_summary(structured: Dict[str, Any]) -> str:
+    """
+    Markdown version of a structured summary, ready to edit and email. Built here
+    rather than by the model, so the fuse call only generates each fact once.
+    """
+    s = StructuredSummary.model_validate(structured)
+    lines = [SUMMARY_HEADING.rstrip("\n"), ""]
+    if s.overview:
+        lines += [s.overview.strip(), ""]
+    lines += _bullets("Agenda", s.agenda)
+    lines += _bullets("Decisions", s.decisions)
+    if s.action_items:
+        lines.append("## Action Items")
+        for a in s.action_items:
+            details = [f"**{a.owner}**"] if a.owner else []
+            if a.deadline:
+                details.append(f"due {a.deadline}")
+            lines.append(f"- [{'x' if a.status == 'done' else ' '}] {a.task}" + (f" ({', '.join(details)})" if details else ""))
+        lines.append("")
+    lines += _bullets("Deadlines", [f"{d.item}: {d.deadline}" for d in s.deadlines])
+    lines += _bullets("Risks", s.risks)
+    lines += _bullets("Open Questions", s.open_questions)
+    return "\n".join(lines).rstrip() + "\n"
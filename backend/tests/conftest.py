@@ -0,0 +1,71 @@
+"""
+Shared fixtures. The backend reads its settings at import time, so the
+environment is pointed at a throwaway database, a fake Groq and a fake SMTP
+server before any test imports it. Summary caches are off, so every model call
+a test expects reaches the fake.
+"""
+import os
+import time
+import tempfile
+
+import pytest
+
+from bench.fake_groq import FakeGroq
+from bench.fake_smtp import FakeSMTP
+
+_tmp = tempfile.mkdtemp(prefix="ai-notes-tests-")
+APP_GROQ = FakeGroq(latency=0.0).start()
+APP_SMTP = FakeSMTP().start()
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{os.path.join(_tmp, 'test.db')}",
+    "GROQ_API_KEY": "fake",
+    "GROQ_BASE_URL": APP_GROQ.base_url,
+    "SMTP_HOST": APP_SMTP.address[0],
+    "SMTP_PORT": str(APP_SMTP.address[1]),
+    "SMTP_USER": "tests@example.com",
+    "SMTP_PASS": "tests",
+    "SMTP_STARTTLS": "false",
+    "SUMMARY_CACHE_PATH": "",
+    "SUMMARY_CACHE_SIZE": "0",
+})
+
+
+def wait_until(predicate, timeout: float = 10.0) -> bool:
+    """
+    Poll predicate until it holds; False if it still does not after timeout seconds.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    from database import init_db
+    init_db()
+
+
+@pytest.fixture
+def fake_groq():
+    """
+    A Groq stand-in of the test's own, for code that is given a client explicitly.
+    """
+    fake = FakeGroq(latency=0.0).start()
+    yield fake
+    fake.stop()
+
+
+@pytest.fixture
+def app_groq():
+    """
+    The Groq stand-in the app's own client talks to.
+    """
+    return APP_GROQ
+
+
+@pytest.fixture
+def smtp():
+    return APP_SMTP
@@ -0,0 +1,73 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app import app
+from bench.transcripts import generate_transcript
+
+INSTRUCTION = "Summarize for action items."
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+def test_append_then_summarize_only_calls_for_new_chunks(client, app_groq):
+    r = client.post("/upload", json={"transcript_text": generate_transcript(15_000, 1)})
+    transcript_id = r.json()["transcript_id"]
+
+    before = app_groq.stats["requests"]
+    r = client.post("/summarize", json={"transcript_id": transcript_id, "instruction": INSTRUCTION})
+    assert r.status_code == 200
+    first = app_groq.stats["requests"] - before
+
+    r = client.post("/upload/append", json={"transcript_id": transcript_id, "transcript_text": "\n" + generate_transcript(6_000, 2)})
+    counts = r.json()
+    assert counts["new_chunks"] >= 1
+    # One map call per chunk plus the fuse call
+    assert first == counts["chunks"] - counts["new_chunks"] + 1
+
+    before = app_groq.stats["requests"]
+    r = client.post("/summarize", json={"transcript_id": transcript_id, "instruction": INSTRUCTION})
+    assert r.status_code == 200
+    assert r.json()["structured"]["action_items"]
+    assert app_groq.stats["requests"] - before == counts["new_chunks"] + 1
+
+    # Nothing new since the last summary: no model calls at all
+    before = app_groq.stats["requests"]
+    assert client.post("/summarize", json={"transcript_id": transcript_id, "instruction": INSTRUCTION}).status_code == 200
+    assert app_groq.stats["requests"] == before
+
+
+def test_streamed_upload_stores_the_same_chunks(client):
+    text = generate_transcript(40_000, 3)
+    pasted = client.post("/upload", json={"transcript_text": text}).json()["transcript_id"]
+    streamed = client.post("/upload/stream", content=text.encode(), headers={"Content-Type": "text/plain"}).json()
+
+    from repository import repo
+    assert list(repo.get_chunks(streamed["transcript_id"])) == list(repo.get_chunks(pasted))
+
+
+def test_concurrent_appends_all_succeed(client):
+    from concurrent.futures import ThreadPoolExecutor
+    transcript_id = client.post("/upload", json={"transcript_text": "Alice: kickoff."}).json()["transcript_id"]
+
+    def append(i):
+        return client.post("/upload/append", json={"transcript_id": transcript_id, "transcript_text": f"\nBob: update {i}. " * 200})
+    with ThreadPoolExecutor(8) as pool:
+        responses = list(pool.map(append, range(8)))
+    assert [r.status_code for r in responses] == [200] * 8
+    assert max(r.json()["chunks"] for r in responses) == sum(r.json()["new_chunks"] for r in responses) + 1
+
+
+def test_upload_keeps_only_compressed_chunks(client):
+    from sqlalchemy import func, select
+    from database import SessionLocal
+    from models import Transcript, TranscriptChunk
+    text = generate_transcript(20_000, 4)
+    transcript_id = client.post("/upload", json={"transcript_text": text}).json()["transcript_id"]
+    with SessionLocal() as db:
+        assert db.scalar(select(Transcript.text).where(Transcript.id == transcript_id)) == ""
+        stored = db.scalar(select(func.sum(func.length(TranscriptChunk.data))).where(TranscriptChunk.transcript_id == transcript_id))
+    assert stored < len(text.encode())
@@ -0,0 +1,60 @@
+import random
+
+import pytest
+
+from bench.transcripts import generate_transcript, iter_pieces
+from chunking import ChunkStream, smart_chunks, count_tokens
+
+
+def stream_chunks(text: str, pieces, target: int, overlap: int):
+    stream = ChunkStream(target, overlap)
+    out = []
+    for piece in pieces:
+        out += stream.feed(piece)
+    return out + stream.close()
+
+
+def random_pieces(text: str, seed: int):
+    rng = random.Random(seed)
+    i = 0
+    while i < len(text):
+        n = rng.randint(1, 5000)
+        yield text[i:i + n]
+        i += n
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("target", [100, 300, 1200])
+def test_stream_matches_whole_text(seed, target):
+    text = generate_transcript(150_000, seed)
+    whole = smart_chunks(text, target, 0)
+    assert stream_chunks(text, random_pieces(text, seed), target, 0) == whole
+    assert stream_chunks(text, iter_pieces(text, 64 * 1024), target, 0) == whole
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("target", [100, 300, 1200])
+def test_chunks_keep_all_text_within_budget(seed, target):
+    # Synthetic transcripts include run-on utterances with no sentence punctuation
+    text = generate_transcript(150_000, seed)
+    chunks = smart_chunks(text, target, 0)
+    assert " ".join(chunks).split() == text.split()
+    assert max(count_tokens(c) for c in chunks) <= target
+
+
+def test_overlapping_chunks_stay_within_budget():
+    text = generate_transcript(50_000, 7)
+    chunks = smart_chunks(text, 300, 60)
+    assert stream_chunks(text, random_pieces(text, 7), 300, 60) == chunks
+    assert max(count_tokens(c) for c in chunks) <= 300
+    # Overlap only adds repeated text; nothing is dropped
+    assert len(" ".join(chunks).split()) > len(text.split())
+    assert set(" ".join(chunks).split()) == set(text.split())
+
+
+def test_boundary_free_text_is_still_chunked():
+    text = " ".join(["word"] * 20_000)
+    chunks = stream_chunks(text, iter_pieces(text, 1000), 300, 0)
+    assert len(chunks) > 1
+    assert " ".join(chunks).split() == text.split()
+    assert max(count_tokens(c) for c in chunks) <= 300
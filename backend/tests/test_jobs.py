@@ -0,0 +1,80 @@
+import time
+import uuid
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+
+import jobs
+from conftest import wait_until
+from database import SessionLocal
+from jobs import JobQueue
+from models import SummaryJob
+
+
+class Runner:
+    def __init__(self, seconds: float = 0.3):
+        self.seconds = seconds
+        self.runs = Counter()
+        self.concurrent = self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, job, report):
+        with self._lock:
+            self.runs[job["id"]] += 1
+            self.concurrent += 1
+            self.peak = max(self.peak, self.concurrent)
+        report({"stage": "map", "completed": 1, "total": 1})
+        time.sleep(self.seconds)
+        with self._lock:
+            self.concurrent -= 1
+        return f"summary-{job['id']}"
+
+
+def test_jobs_run_once_across_queues_sharing_the_table():
+    runner = Runner()
+    first = JobQueue(runner, workers=2)
+    first.start()
+    ids = [first.submit("user", "transcript", "instruction") for _ in range(4)]
+    time.sleep(0.1)
+    # A second process starting while the first is running jobs must not take them over
+    second = JobQueue(runner, workers=2)
+    second.start()
+    try:
+        assert wait_until(lambda: all(first.get(i)["status"] == "done" for i in ids))
+    finally:
+        first.stop()
+        second.stop()
+    assert all(runner.runs[i] == 1 for i in ids)
+    assert all(first.get(i)["summary_id"] == f"summary-{i}" for i in ids)
+
+
+def test_one_user_gets_every_worker_by_default():
+    runner = Runner()
+    queue = JobQueue(runner, workers=jobs.JOB_WORKERS)
+    queue.start()
+    try:
+        ids = [queue.submit("user", "transcript", "instruction") for _ in range(jobs.JOB_WORKERS)]
+        assert wait_until(lambda: all(queue.get(i)["status"] == "done" for i in ids))
+    finally:
+        queue.stop()
+    assert runner.peak == jobs.JOB_WORKERS > 1
+
+
+def test_only_jobs_with_an_expired_lease_are_recovered(monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_LEASE_SECONDS", 5)
+    stale, live = str(uuid.uuid4()), str(uuid.uuid4())
+    with SessionLocal() as db:
+        for job_id, heartbeat in ((stale, 60), (live, 1)):
+            db.add(SummaryJob(id=job_id, username="user", transcript_id="t", instruction="i", status="running",
+                              owner="other", heartbeat_at=datetime.utcnow() - timedelta(seconds=heartbeat), progress={}))
+        db.commit()
+
+    runner = Runner(0.0)
+    queue = JobQueue(runner, workers=1)
+    queue.start()
+    try:
+        assert wait_until(lambda: queue.get(stale)["status"] == "done")
+    finally:
+        queue.stop()
+    assert runner.runs[stale] == 1 and runner.runs[live] == 0
+    assert queue.get(live)["status"] == "running"
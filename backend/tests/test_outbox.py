@@ -0,0 +1,64 @@
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import outbox
+from conftest import wait_until
+from database import SessionLocal
+from models import EmailDelivery
+from outbox import EmailOutbox
+
+
+def deliveries(summary_id: str):
+    with SessionLocal() as db:
+        return db.query(EmailDelivery).filter(EmailDelivery.summary_id == summary_id).all()
+
+
+def test_each_delivery_is_sent_once_by_competing_outboxes(smtp):
+    summary_id = str(uuid.uuid4())
+    first, second = EmailOutbox(workers=4, batch_size=2), EmailOutbox(workers=4, batch_size=2)
+    before = smtp.stats["messages"]
+    ids = first.enqueue(summary_id, "Summary", "body", [f"r{i}@example.com" for i in range(20)])
+    # A second process sees the same rows, e.g. when it starts while they are queued
+    for delivery_id in ids:
+        second._schedule(delivery_id, 0)
+    first.start()
+    second.start()
+    try:
+        assert wait_until(lambda: all(d.status == "sent" for d in deliveries(summary_id)))
+        time.sleep(0.2)
+    finally:
+        first.stop()
+        second.stop()
+    assert smtp.stats["messages"] - before == len(ids) == 10
+    assert all(d.attempts == 1 for d in deliveries(summary_id))
+
+
+def test_abandoned_claim_is_taken_over_after_its_lease(smtp):
+    summary_id = str(uuid.uuid4())
+    with SessionLocal() as db:
+        db.add_all([
+            # Claimed by a process that died, lease expired
+            EmailDelivery(id=str(uuid.uuid4()), summary_id=summary_id, recipients=["a@example.com"], subject="s", body="b",
+                          status="sending", attempts=1, available_at=datetime.utcnow() - timedelta(seconds=1)),
+            # Claimed by a live process
+            EmailDelivery(id=str(uuid.uuid4()), summary_id=summary_id, recipients=["b@example.com"], subject="s", body="b",
+                          status="sending", attempts=1, available_at=datetime.utcnow() + timedelta(minutes=5)),
+        ])
+        db.commit()
+    box = EmailOutbox(workers=1)
+    box.start()
+    try:
+        assert wait_until(lambda: sorted(d.status for d in deliveries(summary_id)) == ["sending", "sent"])
+    finally:
+        box.stop()
+
+
+def test_abandoned_claim_without_attempts_left_fails(smtp):
+    summary_id = str(uuid.uuid4())
+    with SessionLocal() as db:
+        db.add(EmailDelivery(id=str(uuid.uuid4()), summary_id=summary_id, recipients=["a@example.com"], subject="s", body="b",
+                             status="sending", attempts=outbox.OUTBOX_MAX_ATTEMPTS, available_at=datetime.utcnow() - timedelta(seconds=1)))
+        db.commit()
+    EmailOutbox(workers=1).sweep()
+    assert [d.status for d in deliveries(summary_id)] == ["failed"]
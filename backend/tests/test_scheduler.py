@@ -0,0 +1,93 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from groq import Groq, APIConnectionError
+
+from bench.fake_groq import FakeGroq
+from scheduler import GroqScheduler, default_retryable
+
+MESSAGES = [{"role": "system", "content": "Summarize."}, {"role": "user", "content": "Alice: ship it by Friday."}]
+
+
+def completion(fake: FakeGroq):
+    client = Groq(api_key="fake", base_url=fake.base_url, max_retries=0)
+
+    def create(messages, **kwargs):
+        return client.chat.completions.create(model="fake", messages=messages).choices[0].message.content
+    return create
+
+
+def scheduler(**kwargs) -> GroqScheduler:
+    kwargs.setdefault("base_delay", 0.01)
+    return GroqScheduler(retryable=lambda e: isinstance(e, APIConnectionError) or default_retryable(e), **kwargs)
+
+
+def test_client_budget_keeps_calls_under_the_server_quota(fake_groq):
+    fake_groq.rpm = 6
+    sched, create = scheduler(rpm=6), completion(fake_groq)
+    with ThreadPoolExecutor(6) as pool:
+        results = list(pool.map(lambda i: sched.call(create, MESSAGES + [{"role": "user", "content": str(i)}], 10), range(6)))
+    assert len(results) == 6
+    assert fake_groq.stats["rate_limited"] == 0
+    assert sched.stats == {"calls": 6, "retries": 0, "rate_limited": 0, "coalesced": 0}
+
+
+def test_random_429s_are_retried_without_failures(fake_groq):
+    fake_groq.error_rate = 0.2
+    sched, create = scheduler(max_retries=10), completion(fake_groq)
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(lambda i: sched.call(create, MESSAGES + [{"role": "user", "content": str(i)}], 10), range(10)))
+    assert len(results) == 10
+    assert fake_groq.stats["ok"] == 10
+    assert sched.stats["rate_limited"] == fake_groq.stats["rate_limited"]
+    assert sched.stats["calls"] == 10 + fake_groq.stats["rate_limited"]
+
+
+def test_retry_after_pauses_every_caller(fake_groq):
+    # FakeGroq answers its random 429s with retry-after: 1.00
+    fake_groq.error_rate = 1.0
+    sched, create = scheduler(), completion(fake_groq)
+    first = threading.Thread(target=sched.call, args=(create, MESSAGES, 10))
+    first.start()
+    while fake_groq.stats["rate_limited"] == 0:
+        time.sleep(0.001)
+    limited_at = time.monotonic()
+    fake_groq.error_rate = 0.0
+
+    # A different call made during the pause waits it out instead of hitting the API
+    sched.call(create, MESSAGES + [{"role": "user", "content": "later"}], 10)
+    first.join()
+    assert time.monotonic() - limited_at >= 0.9
+    assert fake_groq.stats["requests"] == 3
+    assert sched.stats["rate_limited"] == 1
+
+
+def test_identical_inflight_calls_are_coalesced(fake_groq):
+    fake_groq.latency = 0.3
+    sched, create = scheduler(), completion(fake_groq)
+    barrier = threading.Barrier(4)
+
+    def call(_):
+        barrier.wait()
+        return sched.call(create, MESSAGES, 10)
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(call, range(4)))
+
+    assert len(set(results)) == 1
+    assert fake_groq.stats["requests"] == 1
+    assert sched.stats["calls"] == 1
+    assert sched.stats["coalesced"] == 3
+
+
+def test_non_retryable_errors_are_raised_at_once():
+    sched = scheduler()
+    calls = []
+
+    def fail():
+        calls.append(1)
+        raise ValueError("bad request")
+    with pytest.raises(ValueError):
+        sched.run(fail, 10)
+    assert len(calls) == 1
@@ -0,0 +1,134 @@
+from datetime import date
+
+import pytest
+
+import database
+from repository import repo
+from search import parse_date, normalize_structured, search_index
+
+TODAY = date(2025, 12, 20)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("2025-05-03", date(2025, 5, 3)),
+    ("due 2026-01-09 at noon", date(2026, 1, 9)),
+    ("March 5, 2024", date(2024, 3, 5)),
+    ("Mar. 5th 2024", date(2024, 3, 5)),
+    ("5th of March 2024", date(2024, 3, 5)),
+    ("5 March, 2024", date(2024, 3, 5)),
+    ("March 5", date(2026, 3, 5)),
+    ("5th of March", date(2026, 3, 5)),
+    ("December 1", date(2025, 12, 1)),
+    ("1st of December", date(2025, 12, 1)),
+])
+def test_parse_date(text, expected):
+    assert parse_date(text, TODAY) == expected
+
+
+def test_parse_date_rolls_over_to_the_closest_year():
+    # Early January read in late December is next year's; late December read in January is last year's
+    assert parse_date("January 3", TODAY) == date(2026, 1, 3)
+    assert parse_date("December 28", date(2026, 1, 2)) == date(2025, 12, 28)
+    assert parse_date("29th of February", TODAY) == date(2024, 2, 29)
+
+
+@pytest.mark.parametrize("text", [None, 42, "Friday", "next sprint", "2025-02-30", "February 30, 2025"])
+def test_parse_date_leaves_unresolvable_deadlines(text):
+    assert parse_date(text, TODAY) is None
+
+
+def test_normalize_owner_task_lines():
+    n = normalize_structured({"action_items": [
+        "Priya: send the deck by March 5",
+        "Sam - book the venue",
+        "Update the roadmap (owner= Alex, due: 2026-01-15)",
+        "[x] File the expenses",
+    ]}, TODAY)
+    items = [(i["owner"], i["task"], i["due_date"], i["status"]) for i in n["action_items"]]
+    assert items == [
+        ("Priya", "send the deck by March 5", date(2026, 3, 5), "open"),
+        ("Sam", "book the venue", None, "open"),
+        ("Alex", "Update the roadmap (owner= Alex, due: 2026-01-15)", date(2026, 1, 15), "open"),
+        (None, "File the expenses", None, "done"),
+    ]
+    assert n["owners"] == ["Priya", "Sam", "Alex"]
+
+
+def test_normalize_done_statuses_and_owner_sections():
+    n = normalize_structured({"sections": [
+        {"title": "Owners", "items": ["Priya: ship the beta", "Sam: write the notes"]},
+        {"title": "Deadlines", "items": ["Beta: 2026-02-01", "Retro next sprint"]},
+    ]}, TODAY)
+    assert [(i["owner"], i["task"]) for i in n["action_items"]] == [("Priya", "ship the beta"), ("Sam", "write the notes")]
+    assert [(d["description"], d["due_date"]) for d in n["deadlines"]] == [
+        ("Beta: 2026-02-01", date(2026, 2, 1)),
+        ("Retro next sprint", None),
+    ]
+
+    statuses = normalize_structured({"action_items": [
+        {"task": "a", "status": "Completed"},
+        {"task": "b", "status": "in progress"},
+        {"task": "c", "done": True},
+        {"task": "d", "owner": "TBD"},
+    ]}, TODAY)["action_items"]
+    assert [i["status"] for i in statuses] == ["done", "open", "done", "open"]
+    assert statuses[3]["owner"] is None
+
+
+@pytest.fixture(scope="module")
+def transcript_items():
+    """
+    A transcript with three dated action items and three undated ones.
+    """
+    tid = repo.add_transcript("Planning meeting.")
+    repo.add_summary(tid, {"action_items": [
+        {"task": "undated 1"},
+        {"task": "dated 3", "deadline": "2026-03-03"},
+        {"task": "undated 2"},
+        {"task": "dated 1", "deadline": "2026-01-01"},
+        {"task": "undated 3"},
+        {"task": "dated 2", "deadline": "2026-02-02"},
+    ]}, "Planning meeting.")
+    return tid
+
+
+def test_due_date_pages_run_dated_items_then_undated(transcript_items):
+    pages = [search_index.action_items(transcript_id=transcript_items, limit=4, offset=offset) for offset in (0, 4)]
+    # The first page straddles the last dated item and the first undated one
+    assert [i["task"] for i in pages[0]["results"]] == ["dated 1", "dated 2", "dated 3", "undated 1"]
+    assert pages[0]["has_more"]
+    assert [i["task"] for i in pages[1]["results"]] == ["undated 2", "undated 3"]
+    assert not pages[1]["has_more"]
+
+
+def test_due_date_page_past_the_dated_items(transcript_items):
+    page = search_index.action_items(transcript_id=transcript_items, limit=2, offset=4)
+    assert [i["task"] for i in page["results"]] == ["undated 2", "undated 3"]
+    assert not page["has_more"]
+
+    # An exactly full last page has nothing after it
+    page = search_index.action_items(transcript_id=transcript_items, limit=3, offset=3)
+    assert [i["task"] for i in page["results"]] == ["undated 1", "undated 2", "undated 3"]
+    assert not page["has_more"]
+
+
+def test_due_date_range_leaves_out_undated_items(transcript_items):
+    page = search_index.action_items(transcript_id=transcript_items, due_from=date(2026, 1, 15), limit=5)
+    assert [i["task"] for i in page["results"]] == ["dated 2", "dated 3"]
+    assert not page["has_more"]
+
+
+def test_like_fallback_without_fts5(monkeypatch):
+    tid = repo.add_transcript("Vendor call.")
+    first = repo.add_summary(tid, {}, "Renegotiate the zeppelin_hangar lease (50% off)")
+    second = repo.add_summary(tid, {}, "The Zeppelin_Hangar roof needs repairs")
+    repo.add_summary(tid, {}, "zeppelinXhangar is not a match for the underscore")
+    monkeypatch.setattr(database, "HAS_FTS5", False)
+
+    page = search_index.summaries("zeppelin_hangar", sort="recent")
+    assert [hit["summary_id"] for hit in page["results"]] == [second, first]
+    assert page["results"][1]["snippet"].startswith("Renegotiate the zeppelin_hangar")
+
+    assert [hit["summary_id"] for hit in search_index.summaries('"hangar lease" 50%')["results"]] == [first]
+    page = search_index.summaries("zeppelin_hangar", limit=1)
+    assert page["has_more"] and len(page["results"]) == 1
@@ -0,0 +1,57 @@
+import json
+
+import llm
+from structured import validate_sections, complete, render_summary
+
+VALID = {
+    "overview": "Kickoff for the launch.",
+    "decisions": ["Ship on Friday"],
+    "action_items": [{"task": "Send the deck", "owner": "Priya", "deadline": "May 3", "status": "open"}],
+    "deadlines": [{"item": "Launch", "deadline": "2025-07-01"}],
+}
+
+
+def test_valid_sections_pass_and_common_shapes_are_coerced():
+    sections, broken = validate_sections(dict(VALID, deadlines="Launch: 2025-07-01", risks="Vendor delay"))
+    assert broken == {}
+    assert sections["deadlines"] == [{"item": "Launch", "deadline": "2025-07-01"}]
+    assert sections["risks"] == ["Vendor delay"]
+    assert sections["action_items"][0]["owner"] == "Priya"
+
+
+def test_broken_sections_are_reported_alone():
+    sections, broken = validate_sections(dict(VALID, action_items=[{"owner": "Priya"}], agenda=42))
+    assert set(broken) == {"action_items", "agenda"}
+    assert sections["decisions"] == ["Ship on Friday"]
+    assert "action_items" not in sections
+
+
+def test_broken_section_is_repaired_on_its_own(app_groq):
+    before = app_groq.stats["requests"]
+    structured = llm.parse_fused_output(json.dumps(dict(VALID, action_items=[{"owner": "Priya"}])))
+    # One repair call, for the broken section only; the fake answers with a valid action item list
+    assert app_groq.stats["requests"] - before == 1
+    assert structured["action_items"] == [{"task": "Follow up", "owner": "Alex", "deadline": "2025-01-31", "status": "open"}]
+    assert structured["decisions"] == ["Ship on Friday"]
+
+
+def test_failed_repair_empties_only_that_section(monkeypatch):
+    sent = []
+
+    def failing_call(messages, **kwargs):
+        sent.append(messages)
+        raise RuntimeError("repair model unavailable")
+    monkeypatch.setattr(llm, "call_groq", failing_call)
+
+    structured = llm.parse_fused_output(json.dumps(dict(VALID, deadlines=[{"item": "Launch"}])))
+    assert len(sent) == 1 and "Section: deadlines" in sent[0][1]["content"]
+    assert structured["deadlines"] == []
+    assert structured["overview"] == VALID["overview"]
+    assert structured["action_items"][0]["task"] == "Send the deck"
+
+
+def test_unparseable_reply_is_kept_as_the_overview(monkeypatch):
+    monkeypatch.setattr(llm, "call_groq", lambda messages, **kwargs: "still not json")
+    structured = llm.parse_fused_output("The meeting went fine, no JSON here.")
+    assert structured == complete({"overview": "The meeting went fine, no JSON here."})
+    assert render_summary(structured).startswith("# Meeting Summary\n\nThe meeting went fine")
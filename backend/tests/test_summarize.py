@@ -0,0 +1,64 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import metrics
+from app import app
+from bench.transcripts import generate_transcript
+
+INSTRUCTION = "Summarize the decisions."
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+def summarized() -> int:
+    """
+    Summaries recorded in the summarize stage so far.
+    """
+    state = metrics.STAGE_SECONDS._values.get(("summarize",))
+    return sum(state[0]) if state else 0
+
+
+def upload(client, size: int = 8_000, seed: int = 1) -> str:
+    return client.post("/upload", json={"transcript_text": generate_transcript(size, seed)}).json()["transcript_id"]
+
+
+def test_every_summarize_path_records_the_stage(client):
+    before = summarized()
+    assert client.post("/summarize", json={"transcript_id": upload(client), "instruction": INSTRUCTION}).status_code == 200
+    assert summarized() == before + 1
+
+    items = [{"transcript_id": upload(client, seed=seed), "instruction": INSTRUCTION} for seed in (2, 3)]
+    assert client.post("/summarize/batch", json={"items": items}).status_code == 200
+    assert summarized() == before + 3
+
+    with client.stream("POST", "/summarize/stream", json={"transcript_id": upload(client, seed=4), "instruction": INSTRUCTION}) as r:
+        assert "event: done" in r.read().decode()
+    assert summarized() == before + 4
+
+
+def test_batch_resumes_from_and_saves_checkpoints(client, app_groq):
+    tid = upload(client, 12_000, 5)
+    items = [{"transcript_id": tid, "instruction": INSTRUCTION}]
+    first = client.post("/summarize/batch", json={"items": items}).json()["results"][0]
+    assert first["summary_id"]
+
+    # Nothing new: the checkpoint the batch saved is the summary, without any model call
+    before = app_groq.stats["requests"]
+    again = client.post("/summarize/batch", json={"items": items}).json()["results"][0]
+    assert app_groq.stats["requests"] == before
+    assert again["structured"] == first["structured"]
+
+    counts = client.post("/upload/append", json={"transcript_id": tid, "transcript_text": "\n" + generate_transcript(5_000, 6)}).json()
+    before = app_groq.stats["requests"]
+    assert client.post("/summarize/batch", json={"items": items}).json()["results"][0]["summary_id"]
+    # One map call per new chunk plus the fuse call into the previous summary
+    assert app_groq.stats["requests"] - before == counts["new_chunks"] + 1
+
+    # A checkpoint saved by the batch is picked up by /summarize too
+    before = app_groq.stats["requests"]
+    assert client.post("/summarize", json={"transcript_id": tid, "instruction": INSTRUCTION}).status_code == 200
+    assert app_groq.stats["requests"] == before
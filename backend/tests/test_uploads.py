@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import app
+from uploads import UploadError, multipart_boundary, multipart_file
+
+BOUNDARY = b"----form7MA4YWxkTrZu0gW"
+CONTENT = "Alex: Let's start with the roadmap.\r\nPriya: Sure — first the beta.\n".encode("utf-8") * 3
+
+
+def form(*parts, preamble=b"", closing=True):
+    """
+    A multipart/form-data body of (headers, content) parts.
+    """
+    body = preamble
+    for headers, content in parts:
+        body += b"--" + BOUNDARY + b"\r\n" + headers + b"\r\n\r\n" + content + b"\r\n"
+    if closing:
+        body += b"--" + BOUNDARY + b"--\r\n"
+    return body
+
+
+FILE_PART = (b'Content-Disposition: form-data; name="file"; filename="notes.txt"\r\nContent-Type: text/plain', CONTENT)
+FIELD_PART = (b'Content-Disposition: form-data; name="title"', b"Weekly sync\r\n--not the boundary")
+
+
+def read(body: bytes, *cuts: int) -> bytes:
+    """
+    The file content multipart_file yields when body arrives split at the given offsets.
+    """
+    bounds = [0, *cuts, len(body)]
+    pieces = [body[a:b] for a, b in zip(bounds, bounds[1:])]
+
+    async def stream():
+        for piece in pieces:
+            yield piece
+
+    async def collect():
+        return b"".join([data async for data in multipart_file(stream(), BOUNDARY)])
+
+    return asyncio.run(collect())
+
+
+def test_boundary():
+    assert multipart_boundary(f'multipart/form-data; boundary="{BOUNDARY.decode()}"') == BOUNDARY
+    assert multipart_boundary("multipart/form-data") is None
+
+
+def test_split_at_every_offset():
+    body = form(FIELD_PART, FILE_PART)
+    for cut in range(1, len(body)):
+        assert read(body, cut) == CONTENT, cut
+
+
+def test_byte_at_a_time():
+    body = form(FIELD_PART, FILE_PART)
+    assert read(body, *range(1, len(body))) == CONTENT
+
+
+def test_field_before_the_file_is_skipped():
+    assert read(form(FIELD_PART, FILE_PART, FIELD_PART)) == CONTENT
+
+
+@pytest.mark.parametrize("preamble", [b"", b"preamble\r\n", b"preamble\n", b"\n", b"\r\n\r\n"])
+def test_preamble_line_endings(preamble):
+    body = form(FILE_PART, preamble=preamble)
+    assert read(body) == CONTENT
+    assert read(body, len(preamble) + 3) == CONTENT
+
+
+def test_missing_closing_boundary_is_an_error():
+    body = form(FILE_PART, closing=False)[:-2]
+    with pytest.raises(UploadError, match="closing boundary"):
+        read(body)
+    with pytest.raises(UploadError, match="no file part"):
+        read(form(FIELD_PART))
+
+
+def test_missing_closing_boundary_is_a_400():
+    body = form(FILE_PART, closing=False)[:-2]
+    with TestClient(app) as client:
+        r = client.post(
+            "/upload/stream",
+            content=body,
+            headers={"Content-Type": f"multipart/form-data; boundary={BOUNDARY.decode()}"},
+        )
+        assert r.status_code == 400
+        assert "closing boundary" in r.json()["detail"]
+
+        r = client.post(
+            "/upload/stream",
+            content=form(FIELD_PART, FILE_PART),
+            headers={"Content-Type": f"multipart/form-data; boundary={BOUNDARY.decode()}"},
+        )
+        assert r.status_code == 200
+        assert r.json()["bytes"] == len(CONTENT)
@@ -0,0 +1,122 @@
+import os
+import codecs
+from typing import AsyncIterator, Dict, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from chunking import ChunkStream
+from repository import repo
+import metrics
+
+# Chunks buffered before they are compressed and written in one transaction
+STREAM_FLUSH_CHUNKS = int(os.getenv("STREAM_FLUSH_CHUNKS", "16"))
+# Largest multipart part header block accepted
+MAX_PART_HEADER_BYTES = 16 * 1024
+
+
+class UploadError(ValueError):
+    pass
+
+
+def multipart_boundary(content_type: str) -> Optional[bytes]:
+    for param in content_type.split(";")[1:]:
+        key, _, value = param.strip().partition("=")
+        if key.lower() == "boundary" and value:
+            return value.strip('"').encode("latin-1")
+    return None
+
+
+async def multipart_file(body: AsyncIterator[bytes], boundary: bytes) -> AsyncIterator[bytes]:
+    """
+    Yield the content of the first file part (a part with a filename, or named
+    "file") of a multipart/form-data body as it arrives; other parts are skipped.
+    Holds at most one network read plus the length of the boundary.
+    """
+    opening = b"--" + boundary
+    delimiter = b"\r\n" + opening
+    buf = b""
+    state = "preamble"  # then "headers" and "content" for each part
+    wanted = False
+
+    async for data in body:
+        buf += data
+        while True:
+            if state == "preamble":
+                i = buf.find(opening)
+                if i < 0:
+                    buf = buf[-len(opening):]
+                    break
+                buf = buf[i + len(opening):]
+                state = "headers"
+            elif state == "headers":
+                if buf.startswith(b"--"):
+                    raise UploadError("Multipart body has no file part")
+                end = buf.find(b"\r\n\r\n")
+                if end < 0:
+                    if len(buf) > MAX_PART_HEADER_BYTES:
+                        raise UploadError("Multipart part headers too large")
+                    break
+                headers = buf[:end].decode("latin-1").lower()
+                buf = buf[end + 4:]
+                disposition = next((h for h in headers.split("\r\n") if h.startswith("content-disposition:")), "")
+                wanted = "filename=" in disposition or 'name="file"' in disposition
+                state = "content"
+            else:  # content
+                i = buf.find(delimiter)
+                if i >= 0:
+                    if wanted:
+                        if i:
+                            yield buf[:i]
+                        return
+                    buf = buf[i + len(delimiter):]
+                    state = "headers"
+                    continue
+                # Keep a tail that might be the start of a delimiter split across reads
+                keep = len(delimiter) - 1
+                if len(buf) > keep:
+                    if wanted:
+                        yield buf[:-keep]
+                    buf = buf[-keep:]
+                break
+
+    if state == "content" and wanted:
+        raise UploadError("Multipart body ended before the closing boundary")
+    raise UploadError("Multipart body has no file part")
+
+
+async def ingest(body: AsyncIterator[bytes]) -> Dict[str, object]:
+    """
+    Decode, chunk and store a transcript as its bytes arrive.
+
+    The text is decoded incrementally as UTF-8, fed through a ChunkStream, and
+    completed chunks are written compressed every STREAM_FLUSH_CHUNKS chunks, so
+    memory stays bounded by a few chunks regardless of the transcript's size.
+    The transcript is removed again if the upload fails midway.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    stream = ChunkStream()
+    transcript_id = await run_in_threadpool(repo.start_transcript)
+    stored, pending, size = 0, [], 0
+
+    async def flush():
+        nonlocal stored, pending
+        if pending:
+            await run_in_threadpool(repo.add_chunks, transcript_id, stored, pending)
+            stored += len(pending)
+            pending = []
+
+    try:
+        with metrics.stage("upload_stream"):
+            async for data in body:
+                size += len(data)
+                # Chunking is CPU-bound; keep it off the event loop
+                pending += await run_in_threadpool(stream.feed, decoder.decode(data))
+                if len(pending) >= STREAM_FLUSH_CHUNKS:
+                    await flush()
+            pending += stream.feed(decoder.decode(b"", final=True))
+            pending += stream.close()
+            await flush()
+    except BaseException:
+        await run_in_threadpool(repo.delete_transcript, transcript_id)
+        raise
+    return {"transcript_id": transcript_id, "bytes": size, "chunks": stored}